@@ -6,6 +6,7 @@ class Account:
         self.owner_name = owner_name
         self.account_type = account_type.upper()
         self.balance = float(initial_balance)
+        self.held = 0.0          # reserved by open authorization holds
         self.status = "ACTIVE"
 
     def deposit(self, amount: float) -> float:
@@ -17,14 +18,30 @@ class Account:
     def withdraw(self, amount: float) -> float:
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive.")
-        if amount > self.balance:
+        if amount > self.get_available_balance():
             raise ValueError("Insufficient funds.")
         self.balance -= amount
         return self.balance
 
+    def reserve(self, amount: float) -> float:
+        """Place a hold on `amount`; returns the new available balance."""
+        if amount <= 0:
+            raise ValueError("Hold amount must be positive.")
+        if amount > self.get_available_balance():
+            raise ValueError("Insufficient funds.")
+        self.held += amount
+        return self.get_available_balance()
+
+    def release(self, amount: float) -> float:
+        self.held = max(0.0, self.held - amount)
+        return self.get_available_balance()
+
     def get_balance(self) -> float:
         return self.balance
 
+    def get_available_balance(self) -> float:
+        return self.balance - self.held
+
     def to_dict(self) -> dict:
         return {
             "account_id": self.account_id,
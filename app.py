@@ -1,5 +1,10 @@
 import streamlit as st
+from datetime import datetime, timedelta
+from itertools import islice
+
 from bank import Bank
+from cdc import EventFeed, RecentEvents
+from reports import ReportEngine
 import db
 
 
@@ -105,7 +110,96 @@ section[data-testid="stSidebar"] {
 
 # ---------- DB + Bank init ----------
 db.init_db()
-bank = Bank("Mayank's Bank")
+
+
+@st.cache_resource
+def get_bank() -> Bank:
+    # one Bank per server process, shared by every session and rerun: a Bank per
+    # rerun would replay recovery each time and leave its journal and audit logger behind
+    return Bank("Mayank's Bank")
+
+
+bank = get_bank()
+
+
+@st.cache_resource
+def get_report_engine() -> ReportEngine:
+    # kept across reruns so cached reports survive page interactions
+    return ReportEngine()
+
+
+reports = get_report_engine()
+
+
+@st.cache_resource
+def start_snapshot_refresher():
+    # one refresher per server process; reports read from the snapshot it maintains
+    return db.start_snapshot_refresher(60)
+
+
+start_snapshot_refresher()
+
+
+@st.cache_resource
+def get_live_events() -> RecentEvents:
+    # pushed by the change feed; non-durable, so a stopped app never holds back pruning
+    recent = RecentEvents(50)
+    feed = EventFeed()
+    feed.subscribe("dashboard", recent, durable=False)
+    feed.start()
+    return recent
+
+
+live_events = get_live_events()
+
+
+def account_browser(key: str, page_size: int = 25):
+    """Search form + one sorted page of accounts; `key` keeps each page's state apart."""
+    with st.form(f"{key}_account_search"):
+        f1, f2, f3 = st.columns(3)
+        with f1:
+            owner = st.text_input("👤 Owner name starts with", key=f"{key}_owner")
+            sort = st.selectbox("Sort by", ["account_id", "owner_name", "balance"], key=f"{key}_sort")
+        with f2:
+            acc_type = st.selectbox("Type", ["", "SAVINGS", "CURRENT"], key=f"{key}_type")
+            status = st.selectbox("Status", ["", "ACTIVE", "CLOSED"], key=f"{key}_status")
+        with f3:
+            min_balance = st.number_input("Min balance", min_value=0.0, value=0.0, step=100.0, key=f"{key}_min")
+            max_balance = st.number_input("Max balance (0 = any)", min_value=0.0, value=0.0, step=100.0, key=f"{key}_max")
+        descending = st.checkbox("Descending", key=f"{key}_desc")
+        searched = st.form_submit_button("🔎 Find accounts", use_container_width=True)
+
+    filters = {
+        "owner_prefix": owner.strip() or None,
+        "account_type": acc_type or None,
+        "status": status or None,
+        "min_balance": min_balance or None,
+        "max_balance": max_balance or None,
+        "sort": sort,
+        "descending": descending,
+    }
+    # same keyset paging as the audit trail: a stack of cursors, one per page
+    if searched or st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state[f"{key}_cursors"] = [None]
+
+    cursors = st.session_state[f"{key}_cursors"]
+    page = db.search_accounts(**filters, limit=page_size, after=cursors[-1])
+    if page["rows"]:
+        st.caption(f"Page {len(cursors)}")
+        st.dataframe(page["rows"], use_container_width=True)
+    else:
+        st.info("No accounts match.")
+
+    n1, n2 = st.columns(2)
+    with n1:
+        if len(cursors) > 1 and st.button("⬅️ Previous page", key=f"{key}_prev"):
+            cursors.pop()
+            st.rerun()
+    with n2:
+        if page["next_after"] is not None and st.button("➡️ Next page", key=f"{key}_next"):
+            cursors.append(page["next_after"])
+            st.rerun()
 
 
 # ---------- Hero header ----------
@@ -167,12 +261,53 @@ if menu == "📊 Dashboard":
     with c4:
         st.metric("Average Balance", f"₹{summary['avg_balance']:.2f}")
 
-    st.markdown("### Recent Accounts")
-    accounts = db.get_all_accounts_summary()
-    if accounts is not None and len(accounts) > 0:
-        st.dataframe(accounts, use_container_width=True)
+    # activity from daily_rollups so the page cost doesn't grow with history
+    st.markdown("### Last 30 Days")
+    since = (datetime.utcnow() - timedelta(days=29)).strftime("%Y-%m-%d")
+    daily: dict = {}
+    for r in db.fetch_daily_rollups(since):
+        day = daily.setdefault(
+            r["day"], {"day": r["day"], "deposits": 0.0, "withdrawals": 0.0, "transfers": 0, "volume": 0.0}
+        )
+        day["volume"] += r["total_amount"]
+        if r["tx_type"] == "DEPOSIT":
+            day["deposits"] += r["total_amount"]
+        elif r["tx_type"] == "WITHDRAW":
+            day["withdrawals"] += r["total_amount"]
+        elif r["tx_type"] == "TRANSFER_OUT":
+            day["transfers"] += r["tx_count"]
+
+    if daily:
+        days = list(daily.values())
+        d1, d2, d3, d4 = st.columns(4)
+        with d1:
+            st.metric("Volume", f"₹{sum(d['volume'] for d in days):.2f}")
+        with d2:
+            st.metric("Deposits", f"₹{sum(d['deposits'] for d in days):.2f}")
+        with d3:
+            st.metric("Withdrawals", f"₹{sum(d['withdrawals'] for d in days):.2f}")
+        with d4:
+            st.metric("Transfers", sum(d["transfers"] for d in days))
+        st.bar_chart(days, x="day", y=["deposits", "withdrawals"])
+    else:
+        st.info("No activity in the last 30 days.")
+
+    # pushed by the change feed; right after startup, fall back to the feed's tail
+    st.markdown("### Live Activity")
+    events = live_events.latest(15)
+    if not events:
+        latest = db.latest_event_seq()
+        events = [e for e in db.fetch_events_after(max(0, latest - 15), 15)[::-1] if e["source"] != db.EVENT_GROUP_SOURCE]
+    if events:
+        st.dataframe(
+            [{"seq": e["seq"], "source": e["source"], **e["data"]} for e in events],
+            use_container_width=True,
+        )
     else:
-        st.info("No accounts yet. Create the first one from the sidebar.")
+        st.info("No activity yet.")
+
+    st.markdown("### Accounts")
+    account_browser("dashboard")
     st.markdown("</div>", unsafe_allow_html=True)
 
 
@@ -355,11 +490,50 @@ elif menu == "📋 Reports":
         st.metric("Average Balance", f"₹{summary['avg_balance']:.2f}")
 
     st.markdown("### All Accounts")
-    accounts = db.get_all_accounts_summary()
-    if accounts is not None and len(accounts) > 0:
-        st.dataframe(accounts, use_container_width=True)
-    else:
-        st.info("No accounts available yet.")
+    account_browser("reports")
+
+    period = st.text_input("🗓️ Period (YYYY-MM or YYYY-MM-DD)", value=datetime.utcnow().strftime("%Y-%m"))
+    try:
+        st.markdown("### Daily Inflow / Outflow")
+        flows = reports.daily_flows(period.strip())
+        if flows:
+            st.dataframe(flows, use_container_width=True)
+        else:
+            st.info("No successful transactions in this period.")
+
+        st.markdown("### Top Accounts by Volume")
+        top = reports.top_accounts(period.strip())
+        if top:
+            st.dataframe(top, use_container_width=True)
+        else:
+            st.info("No account activity in this period.")
+
+        st.markdown("### Failure Rates")
+        rates = reports.failure_rates(period.strip())
+        c1, c2 = st.columns(2)
+        with c1:
+            st.dataframe(rates["transactions"], use_container_width=True)
+        with c2:
+            st.dataframe(rates["audit"], use_container_width=True)
+
+        st.markdown("### Account Statement")
+        stmt_acc = st.text_input("🏦 Account ID for statement")
+        if st.button("📄 Generate statement") and stmt_acc.strip():
+            statement = reports.monthly_statement(stmt_acc.strip(), period.strip())
+            s1, s2, s3, s4 = st.columns(4)
+            with s1:
+                st.metric("Opening", f"₹{statement['opening_balance']:.2f}")
+            with s2:
+                st.metric("Credits", f"₹{statement['credits']:.2f}")
+            with s3:
+                st.metric("Debits", f"₹{statement['debits']:.2f}")
+            with s4:
+                st.metric("Closing", f"₹{statement['closing_balance']:.2f}")
+            lines = list(islice(reports.iter_statement_lines(stmt_acc.strip(), period.strip()), 1000))
+            if lines:
+                st.dataframe(lines, use_container_width=True, height=400)
+    except ValueError as e:
+        st.error(f"❌ Error: {e}")
     st.markdown("</div>", unsafe_allow_html=True)
 
 
@@ -368,11 +542,59 @@ elif menu == "🕵️ Audit Trail":
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     st.header("🕵️ Audit Trail")
 
-    recent_audit = db.get_recent_audit_logs(100)
-    if recent_audit is not None and len(recent_audit) > 0:
-        st.dataframe(recent_audit, use_container_width=True, height=450)
+    with st.form("audit_search_form"):
+        q1, q2, q3 = st.columns(3)
+        with q1:
+            text = st.text_input("🔎 Message contains")
+            account_filter = st.text_input("🏦 Account ID")
+        with q2:
+            action = st.selectbox(
+                "Action",
+                ["", "CREATE_ACCOUNT", "DEPOSIT", "WITHDRAW", "TRANSFER", "BALANCE_CHECK", "GET_ACCOUNT", "CLOSE_ACCOUNT"],
+            )
+            status = st.selectbox("Status", ["", "SUCCESS", "FAILED"])
+        with q3:
+            min_amount = st.number_input("Min amount", min_value=0.0, value=0.0, step=100.0)
+            max_amount = st.number_input("Max amount (0 = any)", min_value=0.0, value=0.0, step=100.0)
+        t1, t2 = st.columns(2)
+        with t1:
+            since = st.text_input("From (YYYY-MM-DD)")
+        with t2:
+            until = st.text_input("Until (YYYY-MM-DD, exclusive)")
+        searched = st.form_submit_button("🔎 Search", use_container_width=True)
+
+    filters = {
+        "text": text.strip() or None,
+        "account_id": account_filter.strip() or None,
+        "action": action or None,
+        "status": status or None,
+        "min_amount": min_amount or None,
+        "max_amount": max_amount or None,
+        "since": since.strip() or None,
+        "until": until.strip() or None,
+    }
+    # new search resets to the first page; "Next page" walks the keyset cursor
+    if searched or st.session_state.get("audit_filters") != filters:
+        st.session_state["audit_filters"] = filters
+        st.session_state["audit_cursors"] = [None]
+
+    cursors = st.session_state["audit_cursors"]
+    page = db.search_audit_logs(**filters, limit=100, before_id=cursors[-1])
+    if page["rows"]:
+        st.caption(f"Page {len(cursors)}")
+        st.dataframe(page["rows"], use_container_width=True, height=450)
     else:
-        st.info("No audit entries yet.")
+        st.info("No audit entries match.")
+
+    n1, n2 = st.columns(2)
+    with n1:
+        if len(cursors) > 1 and st.button("⬅️ Previous page"):
+            cursors.pop()
+            st.rerun()
+    with n2:
+        if page["next_before_id"] is not None and st.button("➡️ Next page"):
+            cursors.append(page["next_before_id"])
+            st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
 
 
@@ -0,0 +1,194 @@
+# archive.py
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import db
+from reports import period_bounds
+
+DEFAULT_MAX_AGE_DAYS = 365
+BATCH_SIZE = 5000
+
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS arc.transactions (
+        tx_id TEXT PRIMARY KEY,
+        account_id TEXT NOT NULL,
+        tx_type TEXT NOT NULL,
+        amount REAL NOT NULL,
+        status TEXT NOT NULL,
+        message TEXT,
+        timestamp TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS arc.idx_transactions_account_ts
+    ON transactions (account_id, timestamp)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS arc.audit_log (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        action TEXT NOT NULL,
+        account_id TEXT,
+        amount REAL,
+        status TEXT,
+        message TEXT
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS arc.idx_audit_log_account
+    ON audit_log (account_id, id)
+    """,
+]
+
+TX_COLUMNS = "tx_id, account_id, tx_type, amount, status, message, timestamp"
+AUDIT_COLUMNS = "id, timestamp, action, account_id, amount, status, message"
+
+
+def _months_before(conn, cutoff: str) -> List[str]:
+    """Every YYYY-MM from the oldest hot row up to the month containing `cutoff`."""
+    oldest = conn.execute(
+        """
+        SELECT MIN(ts) FROM (
+            SELECT MIN(timestamp) AS ts FROM transactions WHERE timestamp < ?
+            UNION ALL
+            SELECT MIN(timestamp) FROM audit_log WHERE timestamp < ?
+        )
+        """,
+        (cutoff, cutoff),
+    ).fetchone()[0]
+    if oldest is None:
+        return []
+
+    months = []
+    year, month = int(oldest[:4]), int(oldest[5:7])
+    last = cutoff[:7]
+    while f"{year:04d}-{month:02d}" <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = year + month // 12, month % 12 + 1
+    return months
+
+
+def _move_batches(conn, cur, month: str, kind: str, start: str, upper: str, batch_size: int, pause: float) -> int:
+    """Copy rows of one month into arc.* and then delete them from main, batch by batch.
+
+    With main in WAL mode SQLite does not commit an ATTACHed pair atomically,
+    so each batch is first committed to the archive file on its own and only
+    then deleted from main in a second transaction. A crash in between leaves
+    the rows in both files; the re-run's INSERT OR IGNORE skips them.
+    """
+    if kind == "transactions":
+        key, columns, index_col = "rowid", TX_COLUMNS, "tx_rows"
+    else:
+        key, columns, index_col = "id", AUDIT_COLUMNS, "audit_rows"
+    batch = f"{key} IN (SELECT rid FROM temp.archive_batch)"
+
+    moved = 0
+    while True:
+        cur.execute("BEGIN")
+        cur.execute("DELETE FROM temp.archive_batch")
+        cur.execute(
+            f"""
+            INSERT INTO temp.archive_batch
+            SELECT {key} FROM main.{kind} WHERE timestamp >= ? AND timestamp < ? LIMIT ?
+            """,
+            (start, upper, batch_size),
+        )
+        n = cur.rowcount
+        if n <= 0:
+            conn.commit()
+            return moved
+        cur.execute(f"INSERT OR IGNORE INTO arc.{kind} ({columns}) SELECT {columns} FROM main.{kind} WHERE {batch}")
+        conn.commit()
+
+        # write lock up front, so a busy writer makes us wait instead of failing the upgrade
+        cur.execute("BEGIN IMMEDIATE")
+        if kind == "transactions":
+            cur.execute(
+                f"""
+                INSERT OR IGNORE INTO main.archive_accounts (account_id, month)
+                SELECT DISTINCT account_id, ? FROM main.transactions WHERE {batch}
+                """,
+                (month,),
+            )
+        cur.execute(
+            f"UPDATE main.archive_index SET {index_col} = {index_col} + ?, archived_at = ? WHERE month = ?",
+            (n, datetime.utcnow().isoformat(), month),
+        )
+        cur.execute(f"DELETE FROM main.{kind} WHERE {batch}")
+        # commit per batch so writers only ever wait for one small batch
+        conn.commit()
+        moved += n
+        if pause:
+            time.sleep(pause)
+
+
+def archive_month(month: str, cutoff: str, batch_size: int = BATCH_SIZE, pause: float = 0.0) -> Dict[str, int]:
+    """Move rows of `month` older than `cutoff` into archive/bank-YYYY-MM.db."""
+    start, end = period_bounds(month)
+    upper = min(end, cutoff)
+    with db.get_connection() as conn:
+        has_rows = conn.execute(
+            """
+            SELECT EXISTS (SELECT 1 FROM transactions WHERE timestamp >= ? AND timestamp < ?)
+                OR EXISTS (SELECT 1 FROM audit_log WHERE timestamp >= ? AND timestamp < ?)
+            """,
+            (start, upper, start, upper),
+        ).fetchone()[0]
+    if not has_rows:
+        return {"transactions": 0, "audit_log": 0}
+
+    relative = os.path.join(db.ARCHIVE_DIR, f"bank-{month}.db")
+    os.makedirs(os.path.dirname(db.archive_path(relative)), exist_ok=True)
+
+    with db.get_connection() as conn:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("ATTACH DATABASE ? AS arc", (db.archive_path(relative),))
+        # the copy must be on disk before the rows leave main
+        conn.execute("PRAGMA arc.synchronous = FULL")
+        cur = conn.cursor()
+        for stmt in ARCHIVE_SCHEMA:
+            cur.execute(stmt)
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (rid INTEGER PRIMARY KEY)")
+        cur.execute(
+            "INSERT OR IGNORE INTO main.archive_index (month, path) VALUES (?, ?)",
+            (month, relative),
+        )
+        conn.commit()
+
+        result = {
+            "transactions": _move_batches(conn, cur, month, "transactions", start, upper, batch_size, pause),
+            "audit_log": _move_batches(conn, cur, month, "audit_log", start, upper, batch_size, pause),
+        }
+        conn.execute("DETACH DATABASE arc")
+        return result
+
+
+def archive_old_rows(max_age_days: int = DEFAULT_MAX_AGE_DAYS, batch_size: int = BATCH_SIZE, pause: float = 0.0,
+                     now: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+    """Archive every transaction/audit row older than `max_age_days`, one month file at a time."""
+    cutoff = ((now or datetime.utcnow()) - timedelta(days=max_age_days)).isoformat()
+    with db.get_connection() as conn:
+        months = _months_before(conn, cutoff)
+
+    results = {}
+    for month in months:
+        moved = archive_month(month, cutoff, batch_size, pause)
+        if moved["transactions"] or moved["audit_log"]:
+            results[month] = moved
+    return results
+
+
+if __name__ == "__main__":
+    # usage: python archive.py [MAX_AGE_DAYS]
+    db.init_db()
+    age = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_AGE_DAYS
+    results = archive_old_rows(age)
+    if not results:
+        print("Nothing to archive.")
+    for month, moved in results.items():
+        print(f"📦 {month}: {moved['transactions']} transactions, {moved['audit_log']} audit rows archived")
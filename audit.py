@@ -1,24 +1,186 @@
 
 
+import atexit
+import random
+import threading
+import time
+import weakref
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import db
 
+
+class AuditPolicy:
+    """How each audit action is recorded.
+
+    FULL      -> every event is written synchronously (file + DB)
+    SAMPLE    -> a fraction `rate` of events is written
+    AGGREGATE -> one row per (action, account, status) per `window` seconds,
+                 carrying the event count
+    Money-moving actions are always FULL; a rule that says otherwise is rejected.
+    """
+
+    FULL = "FULL"
+    SAMPLE = "SAMPLE"
+    AGGREGATE = "AGGREGATE"
+
+    SYNC_ACTIONS = {
+        "CREATE_ACCOUNT", "DEPOSIT", "WITHDRAW", "TRANSFER", "CLOSE_ACCOUNT", "RECOVERY",
+        "AUTHORIZE", "CAPTURE", "RELEASE", "EXPIRE_HOLD",
+    }
+
+    DEFAULT_RULES = {
+        "BALANCE_CHECK": (AGGREGATE, 60.0),
+        "GET_ACCOUNT": (AGGREGATE, 60.0),
+    }
+
+    def __init__(self, rules: Optional[Dict[str, Tuple[str, float]]] = None):
+        self.rules: Dict[str, Tuple[str, float]] = {}
+        for action, rule in (self.DEFAULT_RULES if rules is None else rules).items():
+            self.set_rule(action, *rule)
+
+    def set_rule(self, action: str, mode: str, param: float = 0.0):
+        action, mode = action.upper(), mode.upper()
+        if mode not in (self.FULL, self.SAMPLE, self.AGGREGATE):
+            raise ValueError(f"Unknown audit mode {mode}.")
+        if action in self.SYNC_ACTIONS and mode != self.FULL:
+            raise ValueError(f"{action} must be fully audited.")
+        if mode == self.SAMPLE and not 0.0 < param <= 1.0:
+            raise ValueError("Sample rate must be in (0, 1].")
+        if mode == self.AGGREGATE and param <= 0:
+            raise ValueError("Aggregation window must be positive.")
+        self.rules[action] = (mode, float(param))
+
+    def rule_for(self, action: str) -> Tuple[str, float]:
+        return self.rules.get(action, (self.FULL, 0.0))
+
+
+# open aggregation windows of every live logger are written out at exit;
+# weak references, so a discarded logger is not kept alive until then
+_loggers: "weakref.WeakSet[AuditLogger]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    for logger in list(_loggers):
+        logger.flush()
+
+
 class AuditLogger:
-    def __init__(self, logfile: str = "audit.log"):
+    def __init__(self, logfile: str = "audit.log", policy: Optional[AuditPolicy] = None):
         self.entries: List[Dict] = []
         self.logfile = logfile
+        self.policy = policy or AuditPolicy()
+        self._lock = threading.Lock()
+        # (action, account_id, status) -> open aggregation window
+        self._windows: Dict[Tuple[str, str, str], Dict] = {}
+        self._next_flush = float("inf")
+        # closes windows on time even when no further log() call comes
+        self._timer: Optional[threading.Timer] = None
+        self._timer_at = float("inf")
+        _loggers.add(self)
 
     def log(self, action: str, account_id: str = "", amount: float = 0.0, status: str = "SUCCESS", message: str = ""):
-        entry = {
+        action = action.upper()
+        mode, param = self.policy.rule_for(action)
+
+        if mode == AuditPolicy.SAMPLE:
+            if random.random() >= param:
+                return
+            message = f"{message} (sampled 1/{round(1 / param)})"
+        elif mode == AuditPolicy.AGGREGATE:
+            self._aggregate(action, account_id, float(amount), status.upper(), message, param)
+            return
+
+        self._write({
             "timestamp": datetime.utcnow().isoformat(),
-            "action": action.upper(),
+            "action": action,
             "account_id": account_id,
             "amount": float(amount),
             "status": status.upper(),
             "message": message,
-        }
+        })
+        if self._windows and time.monotonic() >= self._next_flush:
+            self.flush(expired_only=True)
+
+    def _aggregate(self, action: str, account_id: str, amount: float, status: str, message: str, window: float):
+        now = time.monotonic()
+        with self._lock:
+            key = (action, account_id, status)
+            bucket = self._windows.get(key)
+            if bucket is None:
+                bucket = self._windows[key] = {
+                    "first": datetime.utcnow().isoformat(),
+                    "closes_at": now + window,
+                    "count": 0,
+                    "amount": 0.0,
+                }
+                self._next_flush = min(self._next_flush, bucket["closes_at"])
+                self._arm_timer(now)
+            bucket["count"] += 1
+            bucket["amount"] += amount
+            bucket["message"] = message
+        if now >= self._next_flush:
+            self.flush(expired_only=True)
+
+    def _arm_timer(self, now: float):
+        """Schedule the background flush for the earliest window close; call with _lock held.
+
+        Windows of one action share a length, so a pending timer usually
+        fires first anyway; it is only replaced when a window closes earlier.
+        """
+        if self._timer is not None:
+            if self._timer_at <= self._next_flush:
+                return
+            self._timer.cancel()
+            self._timer = None
+            self._timer_at = float("inf")
+        if self._next_flush == float("inf"):
+            return
+        self._timer = threading.Timer(max(0.0, self._next_flush - now), self._on_timer)
+        self._timer.daemon = True
+        self._timer_at = self._next_flush
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+                self._timer_at = float("inf")
+        self.flush(expired_only=True)
+
+    def flush(self, expired_only: bool = False):
+        """Write out aggregation windows (all of them, or only the expired ones)."""
+        now = time.monotonic()
+        with self._lock:
+            done = [
+                key for key, bucket in self._windows.items()
+                if not expired_only or bucket["closes_at"] <= now
+            ]
+            buckets = [(key, self._windows.pop(key)) for key in done]
+            self._next_flush = min((b["closes_at"] for b in self._windows.values()), default=float("inf"))
+            self._arm_timer(now)
+
+        for (action, account_id, status), bucket in buckets:
+            self._write({
+                "timestamp": datetime.utcnow().isoformat(),
+                "action": action,
+                "account_id": account_id,
+                "amount": bucket["amount"],
+                "status": status,
+                "message": f"x{bucket['count']} since {bucket['first']}; last: {bucket['message']}",
+            })
+
+    def close(self):
+        """Write out every open window and stop the background flush."""
+        self.flush()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                self._timer_at = float("inf")
 
+    def _write(self, entry: Dict):
         # 1) in memory
         self.entries.append(entry)
 
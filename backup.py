@@ -0,0 +1,326 @@
+# backup.py
+
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import db
+
+BACKUP_DIR = "backups"
+CONSUMER = "backup"   # cdc_offsets entry that keeps unshipped events from being pruned
+
+
+# ---------- manifest ----------
+
+def load_manifest(dest: str = BACKUP_DIR) -> List[Dict]:
+    """Every backup taken into `dest`, oldest first."""
+    try:
+        with open(os.path.join(dest, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _save_manifest(dest: str, entries: List[Dict]):
+    path = os.path.join(dest, "manifest.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _stamp() -> str:
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+
+
+# ---------- taking backups ----------
+
+def full_backup(dest: str = BACKUP_DIR, pages_per_step: int = 1024, sleep: float = 0.005) -> Dict:
+    """Online copy of the whole database; also the base for later incrementals."""
+    os.makedirs(dest, exist_ok=True)
+    # register before copying so nothing after the snapshot can be pruned
+    if db.get_consumer_offset(CONSUMER) is None:
+        db.save_consumer_offset(CONSUMER, db.latest_event_seq())
+    tmp = os.path.join(dest, f"full-{_stamp()}.db.tmp")
+    taken_at = datetime.utcnow().isoformat()
+    stats = db.paced_backup(tmp, pages_per_step, sleep)
+
+    # the copy is a consistent snapshot, so its last CDC seq is exactly where
+    # the incremental chain has to pick up
+    with sqlite3.connect(tmp) as conn:
+        seq = conn.execute(db.LATEST_EVENT_SEQ_SQL).fetchone()[0]
+    conn.close()
+    name = f"full-{_stamp()}-{seq}.db"
+    os.replace(tmp, os.path.join(dest, name))
+
+    db.save_consumer_offset(CONSUMER, max(seq, db.get_consumer_offset(CONSUMER)))
+    entry = {
+        "kind": "full",
+        "file": name,
+        "seq": seq,
+        "taken_at": taken_at,
+        **stats,
+    }
+    _save_manifest(dest, load_manifest(dest) + [entry])
+    return entry
+
+
+def incremental_backup(dest: str = BACKUP_DIR, batch_size: int = 5000) -> Optional[Dict]:
+    """Ship the CDC events written since the last backup as one gzipped JSONL segment."""
+    entries = load_manifest(dest)
+    if not entries:
+        raise RuntimeError("Take a full backup first.")
+    since = entries[-1]["seq"]
+
+    tmp = os.path.join(dest, f"incr-{_stamp()}.jsonl.gz.tmp")
+    started = time.perf_counter()
+    count, last = 0, since
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        while True:
+            events = db.fetch_events_after(last, batch_size)
+            if not events:
+                break
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            count += len(events)
+            last = events[-1]["seq"]
+    if count == 0:
+        os.remove(tmp)
+        return None
+    name = f"incr-{since + 1}-{last}.jsonl.gz"
+    os.replace(tmp, os.path.join(dest, name))
+
+    # shipped: the feed may now prune these events
+    db.save_consumer_offset(CONSUMER, last)
+    entry = {
+        "kind": "incremental",
+        "file": name,
+        "from_seq": since,
+        "seq": last,
+        "events": count,
+        "taken_at": datetime.utcnow().isoformat(),
+        "seconds": time.perf_counter() - started,
+    }
+    _save_manifest(dest, entries + [entry])
+    return entry
+
+
+# ---------- point-in-time restore ----------
+
+def _iter_segment(dest: str, entry: Dict):
+    with gzip.open(os.path.join(dest, entry["file"]), "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def _apply_event(cur, event: Dict):
+    data = event["data"]
+    if event["source"] == "transactions":
+        cur.execute("SELECT 1 FROM transactions WHERE tx_id = ?", (data["tx_id"],))
+        if cur.fetchone():
+            return
+        db.insert_transaction_row(cur, data)
+        if data["status"] == "SUCCESS":
+            cur.execute(
+                "UPDATE accounts SET balance = balance + ? WHERE account_id = ?",
+                (db.signed_amount(data), data["account_id"]),
+            )
+    elif event["source"] == "audit_log":
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO audit_log (id, timestamp, action, account_id, amount, status, message)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (data["id"], data["timestamp"], data["action"], data["account_id"],
+             data["amount"], data["status"], data["message"]),
+        )
+    elif event["source"] == "accounts":
+        if data["op"] == "insert":
+            # opening balance arrives as the account's own transactions
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO accounts (account_id, owner_name, account_type, balance, status, owner_key)
+                VALUES (?, ?, ?, 0.0, ?, ?)
+                """,
+                (data["account_id"], data["owner_name"], data["account_type"], data["status"],
+                 db.owner_key(data["owner_name"])),
+            )
+        else:
+            cur.execute("UPDATE accounts SET status = ? WHERE account_id = ?", (data["status"], data["account_id"]))
+
+
+def restore(target: str, until: Optional[str] = None, until_seq: Optional[int] = None,
+            dest: str = BACKUP_DIR) -> Dict:
+    """Rebuild the database as of `until` (ISO timestamp) or `until_seq` into `target`.
+
+    Starts from the newest full backup at or before that point and replays the
+    shipped transactions, audit rows and account changes after it in sequence
+    order. With `until`, replay stops at the first event stamped later. A cut
+    that falls inside a bracketed write (db.insert_event_mark_row) moves back
+    to its start, so an operation is restored whole or not at all. Holds,
+    jobs and standing orders come from the base backup as they were.
+    """
+    entries = load_manifest(dest)
+    fulls = [
+        e for e in entries if e["kind"] == "full"
+        and (until_seq is None or e["seq"] <= until_seq)
+        and (until is None or e["taken_at"] <= until)
+    ]
+    if not fulls:
+        raise RuntimeError("No full backup old enough for that point in time.")
+    base = fulls[-1]
+    segments = [e for e in entries if e["kind"] == "incremental" and e["seq"] > base["seq"]]
+
+    tmp = target + ".tmp"
+    shutil.copyfile(os.path.join(dest, base["file"]), tmp)
+    conn = sqlite3.connect(tmp)
+    cur = conn.cursor()
+    count, last = 0, base["seq"]
+    try:
+        # replayed rows keep their original CDC numbers: silence the capture
+        # triggers while applying, copy each event across as-is, then restore them
+        triggers = cur.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'cdc_%'"
+        ).fetchall()
+        for name, _ in triggers:
+            cur.execute(f"DROP TRIGGER {name}")
+
+        cur.execute("BEGIN")
+        group = None   # (count, last) where the open bracket started
+        for segment in segments:
+            for event in _iter_segment(dest, segment):
+                if event["seq"] <= last:
+                    continue
+                if until_seq is not None and event["seq"] > until_seq:
+                    break
+                if until is not None and event["data"].get("timestamp", "") > until:
+                    break
+                if event["source"] == db.EVENT_GROUP_SOURCE:
+                    if event["data"]["mark"] == "begin":
+                        cur.execute("SAVEPOINT event_group")
+                        group = (count, last)
+                    else:
+                        cur.execute("RELEASE event_group")
+                        group = None
+                else:
+                    _apply_event(cur, event)
+                cur.execute(
+                    "INSERT INTO cdc_events (seq, source, payload) VALUES (?, ?, ?)",
+                    (event["seq"], event["source"], json.dumps(event["data"])),
+                )
+                count += 1
+                last = event["seq"]
+            else:
+                continue
+            break
+        if group is not None:
+            # the cut fell inside an operation: leave all of it out
+            cur.execute("ROLLBACK TO event_group")
+            cur.execute("RELEASE event_group")
+            count, last = group
+
+        for _, sql in triggers:
+            cur.execute(sql)
+        conn.commit()
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        conn.close()
+    os.replace(tmp, target)
+    return {"base": base["file"], "events": count, "seq": last}
+
+
+# ---------- measuring the cost ----------
+
+def measure_writer_impact(seconds: float = 3.0, pages_per_step: int = 1024, sleep: float = 0.005,
+                          dest: str = BACKUP_DIR) -> Dict:
+    """Writer commit latency with and without a full backup running, plus backup throughput.
+
+    The probe writer upserts its own cdc_offsets row, so it commits real pages
+    without touching ledger data; the row is removed afterwards.
+    """
+    consumer = "backup-probe"
+
+    def probe(stop: threading.Event, latencies: List[float]):
+        i = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            db.save_consumer_offset(consumer, i)
+            latencies.append(time.perf_counter() - started)
+            i += 1
+            time.sleep(0.001)
+
+    def run(during_backup: bool) -> Dict:
+        stop, latencies = threading.Event(), []
+        writer = threading.Thread(target=probe, args=(stop, latencies), daemon=True)
+        writer.start()
+        backup = None
+        if during_backup:
+            backup = full_backup(dest, pages_per_step, sleep)
+        else:
+            time.sleep(seconds)
+        stop.set()
+        writer.join()
+        latencies.sort()
+
+        def pick(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {"commits": len(latencies), "p50_ms": pick(0.50), "p99_ms": pick(0.99),
+                "max_ms": round(latencies[-1] * 1000, 3), "backup": backup}
+
+    try:
+        baseline = run(False)
+        during = run(True)
+    finally:
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM cdc_offsets WHERE consumer = ?", (consumer,))
+
+    backup = during.pop("backup")
+    baseline.pop("backup")
+    return {
+        "backup_mb": round(backup["bytes"] / 1e6, 1),
+        "backup_seconds": round(backup["seconds"], 2),
+        "backup_mb_per_s": round(backup["bytes"] / 1e6 / backup["seconds"], 1),
+        "writer_baseline": baseline,
+        "writer_during_backup": during,
+    }
+
+
+if __name__ == "__main__":
+    # usage: python backup.py full [PAGES_PER_STEP]
+    #        python backup.py incremental
+    #        python backup.py restore TARGET [--until ISO_TIMESTAMP | --until-seq N]
+    #        python backup.py list
+    #        python backup.py bench [PAGES_PER_STEP]
+    db.init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+
+    if command == "full":
+        pages = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+        e = full_backup(pages_per_step=pages)
+        print(f"✅ {e['file']}: {e['bytes'] / 1e6:.1f} MB in {e['seconds']:.2f}s "
+              f"({e['bytes'] / 1e6 / e['seconds']:.1f} MB/s, {e['steps']} steps), up to seq {e['seq']}")
+    elif command == "incremental":
+        e = incremental_backup()
+        print(f"✅ {e['file']}: {e['events']} events, seq {e['from_seq']}..{e['seq']}" if e else "Nothing new to back up.")
+    elif command == "restore":
+        args = sys.argv[2:]
+        until = args[args.index("--until") + 1] if "--until" in args else None
+        until_seq = int(args[args.index("--until-seq") + 1]) if "--until-seq" in args else None
+        r = restore(args[0], until=until, until_seq=until_seq)
+        print(f"✅ Restored {args[0]} from {r['base']} + {r['events']} events (seq {r['seq']})")
+    elif command == "list":
+        for e in load_manifest():
+            print(f"{e['kind']:<12} {e['file']:<36} seq={e['seq']:<10} {e['taken_at']}")
+    elif command == "bench":
+        pages = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+        print(json.dumps(measure_writer_impact(pages_per_step=pages), indent=2))
+    else:
+        print("usage: python backup.py full|incremental|restore|list|bench ...")
+        sys.exit(2)
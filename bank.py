@@ -1,31 +1,155 @@
 # bank_system.py
 
-from uuid import uuid4
-from typing import Dict
+import heapq
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 from account import Account
 from transaction import Transaction
 from audit import AuditLogger
+from journal import OperationJournal, apply_steps, replay
+from risk import COUNTS_AS, RiskEngine
 import db
 
 
+DEFAULT_HOLD_TTL = 7 * 24 * 3600   # seconds an authorization stays open
+
+
 class Bank:
     """Core banking service managing accounts, transactions, and audit logging."""
 
-    def __init__(self, name: str = "MyBank"):
+    def __init__(
+        self,
+        name: str = "MyBank",
+        event_sourced: bool = False,
+        risk: Optional[RiskEngine] = None,
+        journal: Optional[OperationJournal] = None,
+        preload: bool = True,
+    ):
         self.name = name
+        # preload=False: accounts (with their holds and velocity history) are
+        # read on first use, so a one-shot command touches only its own rows
+        self.preload = preload
+        # event-sourced: transactions are authoritative, accounts.balance is a projection
+        self.event_sourced = event_sourced
         self.accounts: Dict[str, Account] = {}
         self.transactions: Dict[str, Transaction] = {}
+        self.holds: Dict[str, Dict] = {}
+        # guards in-memory balances, holds and velocity windows; batch jobs take it
+        # too when they push their postings into this Bank (jobs._sync_bank)
+        self.lock = threading.RLock()
+        # min-heap of (expires_at, hold_id); captured/released holds are skipped lazily
+        self._hold_heap: List[Tuple[str, str]] = []
         self.audit = AuditLogger()
+        self.journal = journal or OperationJournal()
 
-        # load existing accounts from DB into memory
-        self.load_accounts_from_db()
+        # finish anything a previous run left half-done, then load accounts
+        self.risk = risk or RiskEngine()
+        self.recover_operations()
+        if preload:
+            self.load_accounts_from_db()
+            self.load_holds_from_db()
+            # velocity limits: in-memory sliding windows, warmed from recent history
+            self.risk.warm_from_db()
 
     def _generate_account_id(self) -> str:
-        return "ACC-" + uuid4().hex[:8].upper()
+        return "ACC-" + os.urandom(4).hex().upper()
 
     def _generate_tx_id(self) -> str:
-        return "TX-" + uuid4().hex[:10].upper()
+        return "TX-" + os.urandom(5).hex().upper()
+
+    def _generate_hold_id(self) -> str:
+        return "HOLD-" + os.urandom(5).hex().upper()
+
+    def _run_journaled(self, op: str, steps: List[Dict]):
+        """Write the intent to the journal, apply the DB steps, then mark it done.
+
+        If the DB write fails, the in-memory effects described by `steps` are
+        taken back so this Bank keeps matching the DB.
+        """
+        db_steps = steps
+        if self.event_sourced:
+            # balances come from postings: drop absolute balance writes and
+            # insert all postings (with their projection) in one SQL transaction
+            txs = [s["tx"] for s in steps if s["kind"] == "tx"]
+            db_steps = [
+                {**s, "account": {**s["account"], "balance": 0.0}} if s["kind"] == "account" else s
+                for s in steps if s["kind"] not in ("balance", "tx")
+            ]
+            if txs:
+                db_steps.append({"kind": "postings", "txs": txs})
+        op_id = self.journal.begin(op, db_steps)
+        try:
+            apply_steps(db_steps)
+        except Exception:
+            # the INTENT stays on disk: the next recovery rolls it forward
+            self.journal.abandon(op_id)
+            self._undo_in_memory(steps)
+            raise
+        self.journal.complete(op_id)
+
+    def _undo_in_memory(self, steps: List[Dict]):
+        """Take back what an operation did to memory before its DB write failed."""
+        with self.lock:
+            for step in steps:
+                if step["kind"] == "account":
+                    self.accounts.pop(step["account"]["account_id"], None)
+                elif step["kind"] == "balance":
+                    account = self.accounts.get(step["account_id"])
+                    if account is not None:
+                        # by delta: other operations may have moved it since
+                        account.balance -= step["after"] - step["before"]
+                elif step["kind"] == "tx":
+                    self.transactions.pop(step["tx"]["tx_id"], None)
+
+    def _check_velocity(self, action: str, account_id: str, tx_type: str, amount: float):
+        """Reject (audit + ValueError) or flag an operation that breaks a velocity rule."""
+        hits = self.risk.check(account_id, tx_type, amount)
+        if not hits:
+            return
+        for rule, reason in hits:
+            if rule.action == "REJECT":
+                self.audit.log(action, account_id, amount, "FAILED", reason)
+                raise ValueError(reason)
+        for rule, reason in hits:
+            self.audit.log("RISK_FLAG", account_id, amount, "SUCCESS", f"{action}: {reason}")
+
+    def recover_operations(self):
+        """Roll forward journaled operations that a previous run never completed.
+
+        Holds the journal exclusively, so operations other live Banks have in
+        flight on the same journal finish first and are never replayed.
+        """
+        self.journal.acquire_exclusive()
+        try:
+            self._recover_operations()
+        finally:
+            self.journal.release_exclusive()
+
+    def _recover_operations(self):
+        for record in self.journal.incomplete():
+            account_id = next(
+                (
+                    s.get("account_id") or (s["tx"] if "tx" in s else s["txs"][0])["account_id"]
+                    for s in record["steps"] if s["kind"] != "account"
+                ),
+                "",
+            )
+            problem = replay(record)
+            if problem is None:
+                self.journal.complete(record["op_id"])
+                self.audit.log("RECOVERY", account_id, 0.0, "SUCCESS", f"Replayed {record['op']} {record['op_id']}")
+            else:
+                self.audit.log("RECOVERY", account_id, 0.0, "FAILED", f"{record['op']} {record['op_id']}: {problem}")
+        # unresolved operations are carried over for the next attempt
+        self.journal.truncate()
+
+    def close(self):
+        """Flush the audit log and release the operation journal; the Bank must not be used afterwards."""
+        self.audit.close()
+        self.journal.close()
 
     def create_account(
         self,
@@ -37,21 +161,24 @@ class Bank:
         account = Account(account_id, owner_name, account_type, initial_balance)
         self.accounts[account_id] = account
 
-        # save to DB
-        db.save_account(account.to_dict())
-
-        # audit + initial tx
-        self.audit.log("CREATE_ACCOUNT", account_id, initial_balance, "SUCCESS", f"Owner={owner_name}")
-
+        # account row + initial tx go through the journal together
+        steps = [{"kind": "account", "account": account.to_dict()}]
         if initial_balance > 0:
             tx_id = self._generate_tx_id()
             tx = Transaction(tx_id, account_id, "DEPOSIT", initial_balance, "SUCCESS", "Initial deposit")
             self.transactions[tx_id] = tx
-            db.insert_transaction(tx.to_dict())
+            steps.append({"kind": "tx", "tx": tx.to_dict()})
+        self._run_journaled("CREATE_ACCOUNT", steps)
+
+        self.audit.log("CREATE_ACCOUNT", account_id, initial_balance, "SUCCESS", f"Owner={owner_name}")
 
         return account
 
     def get_account(self, account_id: str) -> Account:
+        if account_id not in self.accounts and not self.preload:
+            with self.lock:
+                if account_id not in self.accounts:
+                    self._load_account(account_id)
         if account_id not in self.accounts:
             self.audit.log("GET_ACCOUNT", account_id, 0.0, "FAILED", "Account not found")
             raise KeyError(f"Account {account_id} not found.")
@@ -64,52 +191,59 @@ class Bank:
             raise ValueError("Account is not active.")
 
         tx_id = self._generate_tx_id()
-        try:
-            new_balance = account.deposit(amount)
-
-            # update DB balance
-            db.update_account_balance(account_id, new_balance)
-
-            # transaction record
-            tx = Transaction(tx_id, account_id, "DEPOSIT", amount, "SUCCESS", f"New balance={new_balance}")
-            self.transactions[tx_id] = tx
-            db.insert_transaction(tx.to_dict())
-
-            self.audit.log("DEPOSIT", account_id, amount, "SUCCESS", f"New balance={new_balance}")
-            return new_balance
-        except Exception as e:
-            self.audit.log("DEPOSIT", account_id, amount, "FAILED", str(e))
-            tx = Transaction(tx_id, account_id, "DEPOSIT", amount, "FAILED", str(e))
-            self.transactions[tx_id] = tx
-            db.insert_transaction(tx.to_dict())
-            raise
+        with self.lock:
+            before = account.get_balance()
+            try:
+                new_balance = account.deposit(amount)
+            except Exception as e:
+                self.audit.log("DEPOSIT", account_id, amount, "FAILED", str(e))
+                tx = Transaction(tx_id, account_id, "DEPOSIT", amount, "FAILED", str(e))
+                self.transactions[tx_id] = tx
+                db.insert_transaction(tx.to_dict())
+                raise
+
+        # balance update + transaction record, journaled as one operation
+        tx = Transaction(tx_id, account_id, "DEPOSIT", amount, "SUCCESS", f"New balance={new_balance}")
+        self.transactions[tx_id] = tx
+        self._run_journaled("DEPOSIT", [
+            {"kind": "balance", "account_id": account_id, "before": before, "after": new_balance},
+            {"kind": "tx", "tx": tx.to_dict()},
+        ])
+
+        self.audit.log("DEPOSIT", account_id, amount, "SUCCESS", f"New balance={new_balance}")
+        return new_balance
 
     def withdraw(self, account_id: str, amount: float) -> float:
+        self._expire_due_holds()
         account = self.get_account(account_id)
         if account.status != "ACTIVE":
             self.audit.log("WITHDRAW", account_id, amount, "FAILED", "Account not active")
             raise ValueError("Account is not active.")
-
         tx_id = self._generate_tx_id()
-        try:
-            new_balance = account.withdraw(amount)
-
-            # update DB balance
-            db.update_account_balance(account_id, new_balance)
-
-            # transaction record
-            tx = Transaction(tx_id, account_id, "WITHDRAW", amount, "SUCCESS", f"New balance={new_balance}")
-            self.transactions[tx_id] = tx
-            db.insert_transaction(tx.to_dict())
-
-            self.audit.log("WITHDRAW", account_id, amount, "SUCCESS", f"New balance={new_balance}")
-            return new_balance
-        except Exception as e:
-            self.audit.log("WITHDRAW", account_id, amount, "FAILED", str(e))
-            tx = Transaction(tx_id, account_id, "WITHDRAW", amount, "FAILED", str(e))
-            self.transactions[tx_id] = tx
-            db.insert_transaction(tx.to_dict())
-            raise
+        with self.lock:
+            self._check_velocity("WITHDRAW", account_id, "WITHDRAW", amount)
+            before = account.get_balance()
+            try:
+                new_balance = account.withdraw(amount)
+            except Exception as e:
+                self.audit.log("WITHDRAW", account_id, amount, "FAILED", str(e))
+                tx = Transaction(tx_id, account_id, "WITHDRAW", amount, "FAILED", str(e))
+                self.transactions[tx_id] = tx
+                db.insert_transaction(tx.to_dict())
+                raise
+            # counted now, so concurrent withdrawals cannot both slip under a limit
+            self.risk.record(account_id, "WITHDRAW", amount)
+
+        # balance update + transaction record, journaled as one operation
+        tx = Transaction(tx_id, account_id, "WITHDRAW", amount, "SUCCESS", f"New balance={new_balance}")
+        self.transactions[tx_id] = tx
+        self._run_journaled("WITHDRAW", [
+            {"kind": "balance", "account_id": account_id, "before": before, "after": new_balance},
+            {"kind": "tx", "tx": tx.to_dict()},
+        ])
+
+        self.audit.log("WITHDRAW", account_id, amount, "SUCCESS", f"New balance={new_balance}")
+        return new_balance
 
     def check_balance(self, account_id: str) -> float:
         account = self.get_account(account_id)
@@ -121,14 +255,165 @@ class Bank:
         """Load all accounts from the database into memory (self.accounts)."""
         records = db.fetch_all_accounts()
         for rec in records:
-            acc = Account(
-                rec["account_id"],
-                rec["owner_name"],
-                rec["account_type"],
-                rec["balance"],
-            )
-            acc.status = rec["status"]
-            self.accounts[acc.account_id] = acc
+            self._add_account_row(rec)
+
+    def _add_account_row(self, rec: Dict) -> Account:
+        acc = Account(
+            rec["account_id"],
+            rec["owner_name"],
+            rec["account_type"],
+            rec["balance"],
+        )
+        acc.status = rec["status"]
+        self.accounts[acc.account_id] = acc
+        return acc
+
+    def _load_account(self, account_id: str):
+        """Lazy mode: pull one account, its open holds and its velocity history."""
+        rec = db.fetch_account(account_id)
+        if rec is None:
+            return
+        account = self._add_account_row(rec)
+        for hold in db.fetch_open_holds(account_id):
+            account.held += hold["amount"]
+            self.holds[hold["hold_id"]] = hold
+            heapq.heappush(self._hold_heap, (hold["expires_at"], hold["hold_id"]))
+        self.risk.warm_from_db(account_id)
+        self._expire_due_holds()
+
+    def load_holds_from_db(self):
+        """Re-apply open authorization holds to the in-memory accounts."""
+        for rec in db.fetch_open_holds():
+            account = self.accounts.get(rec["account_id"])
+            if account is None:
+                continue
+            account.held += rec["amount"]
+            self.holds[rec["hold_id"]] = rec
+            self._hold_heap.append((rec["expires_at"], rec["hold_id"]))
+        heapq.heapify(self._hold_heap)
+
+    def get_available_balance(self, account_id: str) -> float:
+        """Balance minus funds reserved by open holds."""
+        self._expire_due_holds()
+        return self.get_account(account_id).get_available_balance()
+
+    def authorize(self, account_id: str, amount: float, ttl_seconds: float = DEFAULT_HOLD_TTL) -> str:
+        """Reserve `amount` against the available balance; returns the hold id."""
+        self._expire_due_holds()
+        account = self.get_account(account_id)
+        if account.status != "ACTIVE":
+            self.audit.log("AUTHORIZE", account_id, amount, "FAILED", "Account not active")
+            raise ValueError("Account is not active.")
+        with self.lock:
+            try:
+                available = account.reserve(amount)
+            except Exception as e:
+                self.audit.log("AUTHORIZE", account_id, amount, "FAILED", str(e))
+                raise
+
+        now = datetime.utcnow()
+        hold = {
+            "hold_id": self._generate_hold_id(),
+            "account_id": account_id,
+            "amount": float(amount),
+            "status": "OPEN",
+            "created_at": now.isoformat(),
+            "expires_at": (now + timedelta(seconds=ttl_seconds)).isoformat(),
+        }
+        try:
+            db.insert_hold(hold)
+        except Exception:
+            with self.lock:
+                account.release(amount)
+            raise
+        with self.lock:
+            self.holds[hold["hold_id"]] = hold
+            heapq.heappush(self._hold_heap, (hold["expires_at"], hold["hold_id"]))
+
+        self.audit.log("AUTHORIZE", account_id, amount, "SUCCESS", f"{hold['hold_id']}, available={available}")
+        return hold["hold_id"]
+
+    def capture(self, hold_id: str, amount: Optional[float] = None) -> float:
+        """Debit up to the held amount; any remainder of the hold is released."""
+        self._expire_due_holds()
+        with self.lock:
+            hold = self.holds.pop(hold_id, None)
+            if hold is None:
+                self.audit.log("CAPTURE", "", amount or 0.0, "FAILED", f"Hold {hold_id} not open")
+                raise KeyError(f"Hold {hold_id} not open.")
+            account_id = hold["account_id"]
+            amount = hold["amount"] if amount is None else amount
+            if amount <= 0 or amount > hold["amount"]:
+                self.holds[hold_id] = hold
+                self.audit.log("CAPTURE", account_id, amount, "FAILED", "Amount outside hold")
+                raise ValueError("Capture amount must be positive and within the hold.")
+            try:
+                # the debit happens here, so it counts against the withdrawal limits
+                self._check_velocity("CAPTURE", account_id, COUNTS_AS["CAPTURE"], amount)
+            except ValueError:
+                self.holds[hold_id] = hold
+                raise
+
+            account = self.get_account(account_id)
+            before = account.get_balance()
+            account.release(hold["amount"])
+            new_balance = account.withdraw(amount)   # covered by the hold just released
+            self.risk.record(account_id, COUNTS_AS["CAPTURE"], amount)
+
+        tx_id = self._generate_tx_id()
+        tx = Transaction(tx_id, account_id, "CAPTURE", amount, "SUCCESS", f"{hold_id}, new balance={new_balance}")
+        self.transactions[tx_id] = tx
+        try:
+            self._run_journaled("CAPTURE", [
+                {"kind": "hold", "hold_id": hold_id, "account_id": account_id, "status": "CAPTURED"},
+                {"kind": "balance", "account_id": account_id, "before": before, "after": new_balance},
+                {"kind": "tx", "tx": tx.to_dict()},
+            ])
+        except Exception:
+            # the balance is already restored; reopen the hold as well
+            with self.lock:
+                account.held += hold["amount"]
+                self.holds[hold_id] = hold
+                heapq.heappush(self._hold_heap, (hold["expires_at"], hold_id))
+            raise
+
+        self.audit.log("CAPTURE", account_id, amount, "SUCCESS", f"{hold_id}, new balance={new_balance}")
+        return new_balance
+
+    def release(self, hold_id: str):
+        """Cancel an open hold, making its funds available again."""
+        with self.lock:
+            hold = self.holds.pop(hold_id, None)
+            if hold is None:
+                self.audit.log("RELEASE", "", 0.0, "FAILED", f"Hold {hold_id} not open")
+                raise KeyError(f"Hold {hold_id} not open.")
+            self.accounts[hold["account_id"]].release(hold["amount"])
+        db.update_hold_status(hold_id, "RELEASED")
+        self.audit.log("RELEASE", hold["account_id"], hold["amount"], "SUCCESS", hold_id)
+
+    def _expire_due_holds(self):
+        # O(1) peek at the earliest expiry; the sweep itself only runs when due
+        if self._hold_heap and self._hold_heap[0][0] <= datetime.utcnow().isoformat():
+            self.expire_holds()
+
+    def expire_holds(self, now: Optional[str] = None) -> List[str]:
+        """Expire every open hold whose expires_at <= now (ISO timestamp)."""
+        now = now or datetime.utcnow().isoformat()
+        expired = db.expire_holds_before(now)
+        released = []
+        with self.lock:
+            while self._hold_heap and self._hold_heap[0][0] <= now:
+                _, hold_id = heapq.heappop(self._hold_heap)
+                hold = self.holds.pop(hold_id, None)
+                if hold is None:
+                    continue   # already captured or released
+                account = self.accounts.get(hold["account_id"])
+                if account is not None:
+                    account.release(hold["amount"])
+                released.append(hold)
+        for hold in released:
+            self.audit.log("EXPIRE_HOLD", hold["account_id"], hold["amount"], "SUCCESS", hold["hold_id"])
+        return expired
 
     def close_account(self, account_id: str):
         """Mark an account as CLOSED in memory, DB, and audit trail."""
@@ -162,6 +447,7 @@ class Bank:
             raise ValueError("Cannot transfer to the same account.")
 
         # Get accounts
+        self._expire_due_holds()
         from_acc = self.get_account(from_account_id)
         to_acc = self.get_account(to_account_id)
 
@@ -177,55 +463,60 @@ class Bank:
         tx_out_id = self._generate_tx_id()
         tx_in_id = self._generate_tx_id()
 
-        try:
-            # 1) Withdraw from source
-            new_from_balance = from_acc.withdraw(amount)
-            db.update_account_balance(from_account_id, new_from_balance)
-
-            tx_out = Transaction(
-                tx_out_id,
-                from_account_id,
-                "TRANSFER_OUT",
-                amount,
-                "SUCCESS",
-                f"To {to_account_id}, new balance={new_from_balance}",
-            )
-            self.transactions[tx_out_id] = tx_out
-            db.insert_transaction(tx_out.to_dict())
-
-            # 2) Deposit to destination
-            new_to_balance = to_acc.deposit(amount)
-            db.update_account_balance(to_account_id, new_to_balance)
-
-            tx_in = Transaction(
-                tx_in_id,
-                to_account_id,
-                "TRANSFER_IN",
-                amount,
-                "SUCCESS",
-                f"From {from_account_id}, new balance={new_to_balance}",
-            )
-            self.transactions[tx_in_id] = tx_in
-            db.insert_transaction(tx_in.to_dict())
-
-            # 3) Audit
-            self.audit.log(
-                "TRANSFER",
-                from_account_id,
-                amount,
-                "SUCCESS",
-                f"From {from_account_id} to {to_account_id}",
-            )
-
-        except Exception as e:
-            # One side failed: record failed transfer
-            self.audit.log(
-                "TRANSFER",
-                from_account_id,
-                amount,
-                "FAILED",
-                f"Error: {e}",
-            )
-            # Note: for full ACID, you'd wrap DB work in an explicit SQL transaction.
-            raise
+        with self.lock:
+            self._check_velocity("TRANSFER", from_account_id, "TRANSFER_OUT", amount)
+            from_before = from_acc.get_balance()
+            to_before = to_acc.get_balance()
+            try:
+                # 1) Withdraw from source, deposit to destination (in memory)
+                new_from_balance = from_acc.withdraw(amount)
+                new_to_balance = to_acc.deposit(amount)
+            except Exception as e:
+                # Validation failed: nothing was written
+                self.audit.log(
+                    "TRANSFER",
+                    from_account_id,
+                    amount,
+                    "FAILED",
+                    f"Error: {e}",
+                )
+                raise
+            self.risk.record(from_account_id, "TRANSFER_OUT", amount)
+
+        tx_out = Transaction(
+            tx_out_id,
+            from_account_id,
+            "TRANSFER_OUT",
+            amount,
+            "SUCCESS",
+            f"To {to_account_id}, new balance={new_from_balance}",
+        )
+        tx_in = Transaction(
+            tx_in_id,
+            to_account_id,
+            "TRANSFER_IN",
+            amount,
+            "SUCCESS",
+            f"From {from_account_id}, new balance={new_to_balance}",
+        )
+        self.transactions[tx_out_id] = tx_out
+        self.transactions[tx_in_id] = tx_in
+
+        # 2) Both legs go through the journal: if we die midway,
+        #    recover_operations() finishes the transfer on the next start
+        self._run_journaled("TRANSFER", [
+            {"kind": "balance", "account_id": from_account_id, "before": from_before, "after": new_from_balance},
+            {"kind": "tx", "tx": tx_out.to_dict()},
+            {"kind": "balance", "account_id": to_account_id, "before": to_before, "after": new_to_balance},
+            {"kind": "tx", "tx": tx_in.to_dict()},
+        ])
+
+        # 3) Audit
+        self.audit.log(
+            "TRANSFER",
+            from_account_id,
+            amount,
+            "SUCCESS",
+            f"From {from_account_id} to {to_account_id}",
+        )
 
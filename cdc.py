@@ -0,0 +1,215 @@
+# cdc.py
+
+import json
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import db
+
+BATCH_SIZE = 1000
+PRUNE_INTERVAL = 60.0   # seconds between prunes of fully consumed events
+
+
+class EventFeed:
+    """In-process pub/sub over the cdc_events sequence.
+
+    One poller thread reads new events in batches (a primary-key range scan
+    after the lowest subscriber offset) and hands each subscriber the events
+    it has not seen yet. A subscriber's offset is persisted in cdc_offsets
+    only after its callback returns, so a crash redelivers rather than drops.
+    While running, the feed also prunes events every durable consumer has
+    processed, every `prune_interval` seconds.
+    """
+
+    def __init__(self, poll_interval: float = 0.5, batch_size: int = BATCH_SIZE,
+                 prune_interval: Optional[float] = PRUNE_INTERVAL):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.prune_interval = prune_interval
+        self._subscribers: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, consumer: str, callback: Callable[[List[Dict]], None], from_start: bool = False,
+                  durable: bool = True):
+        """Register `callback(events)`; resumes from the consumer's saved offset.
+
+        New consumers start at the current end of the feed unless `from_start`.
+        A non-durable consumer (e.g. a UI view) starts at the end every time and
+        never saves an offset, so it does not hold back pruning while it is away.
+        """
+        offset = db.get_consumer_offset(consumer) if durable else None
+        if offset is None:
+            offset = 0 if from_start else db.latest_event_seq()
+            if durable:
+                db.save_consumer_offset(consumer, offset)
+        with self._lock:
+            self._subscribers[consumer] = {"callback": callback, "offset": offset, "durable": durable}
+
+    def unsubscribe(self, consumer: str):
+        with self._lock:
+            self._subscribers.pop(consumer, None)
+
+    def notify(self):
+        """Wake the poller now (e.g. right after a local write)."""
+        self._wake.set()
+
+    def poll_once(self) -> int:
+        """Deliver every pending event to every subscriber; returns events read."""
+        with self._lock:
+            subs = dict(self._subscribers)
+        if not subs:
+            return 0
+
+        total = 0
+        cursor = min(s["offset"] for s in subs.values())
+        while True:
+            events = db.fetch_events_after(cursor, self.batch_size)
+            if not events:
+                return total
+            total += len(events)
+            for consumer, sub in list(subs.items()):
+                pending = [e for e in events if e["seq"] > sub["offset"]]
+                if not pending:
+                    continue
+                try:
+                    sub["callback"](pending)
+                except Exception as e:
+                    # leave the offset alone and skip the consumer for the rest of
+                    # this poll, so the batch is retried next poll instead of
+                    # being jumped over by a later batch
+                    print(f"CDC consumer {consumer} failed: {e}")
+                    del subs[consumer]
+                    continue
+                sub["offset"] = pending[-1]["seq"]
+                if sub["durable"]:
+                    db.save_consumer_offset(consumer, sub["offset"])
+            if not subs:
+                return total
+            cursor = events[-1]["seq"]
+
+    def start(self) -> threading.Thread:
+        def loop():
+            next_prune = time.monotonic() + (self.prune_interval or 0)
+            while not self._stop.is_set():
+                try:
+                    self.poll_once()
+                    if self.prune_interval and time.monotonic() >= next_prune:
+                        db.prune_cdc_events()
+                        next_prune = time.monotonic() + self.prune_interval
+                except db.sqlite3.Error as e:
+                    print(f"CDC feed failed: {e}")
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, name="cdc-feed", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class JsonlExporter:
+    """Subscriber that appends events to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, events: List[Dict]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+
+class WebhookSink:
+    """Subscriber that POSTs each batch as JSON to `url` (e.g. a local stand-in)."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, events: List[Dict]):
+        body = json.dumps({"events": events}).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"Webhook returned {response.status}")
+
+
+class RecentEvents:
+    """Subscriber that keeps the last `size` events in memory (for a live view).
+
+    Transaction brackets carry no data of their own and are left out.
+    """
+
+    def __init__(self, size: int = 50):
+        self._events = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __call__(self, events: List[Dict]):
+        with self._lock:
+            self._events.extend(e for e in events if e["source"] != db.EVENT_GROUP_SOURCE)
+
+    def latest(self, n: int = 15) -> List[Dict]:
+        """Newest first."""
+        with self._lock:
+            return list(self._events)[::-1][:n]
+
+
+def consumer_status() -> List[Dict]:
+    """Every durable consumer with its offset and how many events it is behind."""
+    latest = db.latest_event_seq()
+    with db.get_read_connection() as conn:
+        rows = conn.execute("SELECT consumer, seq, updated_at FROM cdc_offsets ORDER BY consumer").fetchall()
+    return [{"consumer": c, "seq": seq, "lag": latest - seq, "updated_at": at} for c, seq, at in rows]
+
+
+if __name__ == "__main__":
+    # usage: python cdc.py run [--jsonl PATH] [--webhook URL] [--from-start]
+    #        python cdc.py prune
+    #        python cdc.py status
+    db.init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    args = sys.argv[2:]
+
+    if command == "run":
+        sinks = {}
+        if "--jsonl" in args:
+            path = args[args.index("--jsonl") + 1]
+            sinks[f"jsonl:{path}"] = JsonlExporter(path)
+        if "--webhook" in args:
+            url = args[args.index("--webhook") + 1]
+            sinks[f"webhook:{url}"] = WebhookSink(url)
+        if not sinks:
+            print("Nothing to run: pass --jsonl PATH and/or --webhook URL.")
+            sys.exit(2)
+        feed = EventFeed()
+        for consumer, sink in sinks.items():
+            feed.subscribe(consumer, sink, from_start="--from-start" in args)
+        feed.start()
+        print(f"📡 Streaming change events to {', '.join(sinks)} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            feed.stop()
+    elif command == "prune":
+        print(f"🧹 Pruned {db.prune_cdc_events()} processed events.")
+    elif command == "status":
+        for c in consumer_status():
+            print(f"{c['consumer']:<40} seq={c['seq']:<10} lag={c['lag']:<8} {c['updated_at']}")
+    else:
+        print("usage: python cdc.py run|prune|status ...")
+        sys.exit(2)
@@ -1,13 +1,28 @@
 # db.py
 
+import json
+import os
+import queue
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict
 
 DB_NAME = "bank.db"
+ARCHIVE_DIR = "archive"   # per-month cold files, relative to the DB_NAME directory
+
+READ_POOL_SIZE = 4
+SNAPSHOT_MAX_AGE = 300     # seconds before analytics fall back to the live DB
+SCHEMA_VERSION = 4         # bump whenever init_db gains a table, index or trigger
 
 @contextmanager
 def get_connection():
     conn = sqlite3.connect(DB_NAME)
+    # WAL + NORMAL: commits skip the per-statement fsync; the operation
+    # journal (journal.py) covers multi-step operations across a crash
+    conn.execute("PRAGMA synchronous = NORMAL")
     try:
         yield conn
         conn.commit()
@@ -15,17 +30,148 @@ def get_connection():
         conn.close()
 
 
+# ---------- read side ----------
+
+_read_pools: dict = {}
+_read_pools_lock = threading.Lock()
+
+
+def snapshot_name() -> str:
+    """Path of the analytics snapshot that sits next to DB_NAME."""
+    return os.path.splitext(DB_NAME)[0] + ".snapshot.db"
+
+
+def _open_read_only(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+@contextmanager
+def get_read_connection(analytics: bool = False):
+    """Borrow a read-only connection from a pool.
+
+    With `analytics=True` the connection points at the backup snapshot when a
+    fresh one exists, so heavy report queries never touch the live file.
+    """
+    path = DB_NAME
+    key = (os.path.abspath(DB_NAME), None)
+    if analytics:
+        snap = snapshot_name()
+        try:
+            mtime = os.stat(snap).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is not None and time.time() - mtime / 1e9 <= SNAPSHOT_MAX_AGE:
+            # mtime in the key: a refreshed snapshot gets a fresh pool
+            path = snap
+            key = (os.path.abspath(snap), mtime)
+
+    with _read_pools_lock:
+        pool = _read_pools.get(key)
+        if pool is None:
+            for old in [k for k in _read_pools if k[0] == key[0]]:
+                del _read_pools[old]
+            pool = _read_pools[key] = queue.Queue(maxsize=READ_POOL_SIZE)
+
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open_read_only(path)
+
+    try:
+        yield conn
+    finally:
+        conn.row_factory = None
+        conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def paced_backup(target: str, pages_per_step: int = 1024, sleep: float = 0.005) -> Dict:
+    """Copy DB_NAME to `target` with the SQLite backup API, a few pages at a time.
+
+    The source connection holds one read transaction for the whole copy, so
+    commits from other connections neither restart the backup nor leak into
+    it: the result is the database as of the start. In WAL mode writers never
+    wait on the copy; the sleep between steps only eases I/O pressure.
+    """
+    src = sqlite3.connect(DB_NAME)
+    dst = sqlite3.connect(target)
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+
+    started = time.perf_counter()
+    try:
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+        src.backup(dst, pages=pages_per_step, sleep=sleep, progress=progress)
+        src.rollback()
+        # copies are opened with mode=ro or shipped as single files: no WAL
+        dst.execute("PRAGMA journal_mode = DELETE")
+        pages = dst.execute("PRAGMA page_count").fetchone()[0]
+        page_size = dst.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return {
+        "pages": pages,
+        "bytes": pages * page_size,
+        "steps": steps,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def refresh_snapshot(pages_per_step: int = 1024, sleep: float = 0.005) -> str:
+    """Copy DB_NAME to the analytics snapshot (see paced_backup).
+
+    The snapshot is swapped in atomically once complete.
+    """
+    target = snapshot_name()
+    tmp = target + ".tmp"
+    paced_backup(tmp, pages_per_step, sleep)
+    os.replace(tmp, target)
+    return target
+
+
+def start_snapshot_refresher(interval: float = 60.0) -> threading.Thread:
+    """Refresh the analytics snapshot every `interval` seconds in a daemon thread."""
+    def loop():
+        while True:
+            try:
+                refresh_snapshot()
+            except sqlite3.Error as e:
+                print(f"Snapshot refresh failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="snapshot-refresher", daemon=True)
+    thread.start()
+    return thread
+
+
 def init_db():
     with get_connection() as conn:
+        # fast path: a database already at this schema version needs no DDL
+        if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
         cur = conn.cursor()
 
+        # WAL lets the read-only pool run alongside writers without blocking them
+        cur.execute("PRAGMA journal_mode = WAL")
+
         cur.execute("""
         CREATE TABLE IF NOT EXISTS accounts (
             account_id TEXT PRIMARY KEY,
             owner_name TEXT NOT NULL,
             account_type TEXT NOT NULL,
             balance REAL NOT NULL,
-            status TEXT NOT NULL
+            status TEXT NOT NULL,
+            owner_key TEXT
         )
         """)
 
@@ -53,24 +199,235 @@ def init_db():
         )
         """)
 
+        # indexes for per-account statements and period reports; the per-account
+        # one also covers type/status/amount so ledger checks never touch the table
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_account_cover
+        ON transactions (account_id, timestamp, tx_type, status, amount)
+        """)
+        cur.execute("DROP INDEX IF EXISTS idx_transactions_account_ts")
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_ts
+        ON transactions (timestamp)
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_ts
+        ON audit_log (timestamp)
+        """)
+
+        # account search: owner_key is the casefolded owner name (SQLite's
+        # lower() only folds ASCII); both indexes end in account_id so sorted
+        # pages can resume from a keyset cursor
+        if "owner_key" not in [r[1] for r in cur.execute("PRAGMA table_info(accounts)")]:
+            cur.execute("ALTER TABLE accounts ADD COLUMN owner_key TEXT")
+        missing = cur.execute("SELECT account_id, owner_name FROM accounts WHERE owner_key IS NULL").fetchall()
+        cur.executemany(
+            "UPDATE accounts SET owner_key = ? WHERE account_id = ?",
+            [(owner_key(name), account_id) for account_id, name in missing],
+        )
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_accounts_owner_key
+        ON accounts (owner_key, account_id)
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_accounts_balance
+        ON accounts (balance, account_id)
+        """)
+
+        # daily rollups (successful transactions only), kept in step by insert_transaction
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            day TEXT NOT NULL,
+            account_type TEXT NOT NULL,
+            tx_type TEXT NOT NULL,
+            tx_count INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            min_amount REAL NOT NULL,
+            max_amount REAL NOT NULL,
+            PRIMARY KEY (day, account_type, tx_type)
+        )
+        """)
+
+        # cold-tier index: which months were archived and which accounts they contain
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS archive_index (
+            month TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            tx_rows INTEGER NOT NULL DEFAULT 0,
+            audit_rows INTEGER NOT NULL DEFAULT 0,
+            archived_at TEXT
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS archive_accounts (
+            account_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            PRIMARY KEY (account_id, month)
+        ) WITHOUT ROWID
+        """)
+
+        # audit search: structured filter indexes + FTS5 over audit_log.message
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_account
+        ON audit_log (account_id, id)
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_action
+        ON audit_log (action, id)
+        """)
+        fts_exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'audit_fts'"
+        ).fetchone()
+        cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS audit_fts
+        USING fts5(message, content='audit_log', content_rowid='id')
+        """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS audit_fts_insert AFTER INSERT ON audit_log BEGIN
+            INSERT INTO audit_fts (rowid, message) VALUES (new.id, new.message);
+        END
+        """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS audit_fts_delete AFTER DELETE ON audit_log BEGIN
+            INSERT INTO audit_fts (audit_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        END
+        """)
+        if not fts_exists:
+            # index audit rows written before the FTS table existed
+            cur.execute("INSERT INTO audit_fts (audit_fts) VALUES ('rebuild')")
+
+        # authorization holds; open holds are swept by expiry time
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS holds (
+            hold_id TEXT PRIMARY KEY,
+            account_id TEXT NOT NULL,
+            amount REAL NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL
+        )
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_holds_open_expiry
+        ON holds (expires_at) WHERE status = 'OPEN'
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_holds_open_account
+        ON holds (account_id) WHERE status = 'OPEN'
+        """)
+
+        # batch jobs: per-partition progress checkpoints and standing orders
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS job_runs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            range_lo TEXT NOT NULL DEFAULT '',
+            range_hi TEXT NOT NULL DEFAULT '',
+            checkpoint TEXT NOT NULL DEFAULT '',
+            processed INTEGER NOT NULL DEFAULT 0,
+            started_at TEXT NOT NULL,
+            finished_at TEXT
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS standing_orders (
+            order_id TEXT PRIMARY KEY,
+            from_account_id TEXT NOT NULL,
+            to_account_id TEXT NOT NULL,
+            amount REAL NOT NULL,
+            interval_days INTEGER NOT NULL,
+            next_run TEXT NOT NULL,
+            status TEXT NOT NULL
+        )
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_standing_orders_due
+        ON standing_orders (next_run) WHERE status = 'ACTIVE'
+        """)
+
+        # change-data-capture: every committed transaction/audit row gets a
+        # sequence number (AUTOINCREMENT never reuses one) and a JSON payload
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS cdc_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            payload TEXT NOT NULL
+        )
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS cdc_offsets (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS cdc_transactions AFTER INSERT ON transactions BEGIN
+            INSERT INTO cdc_events (source, payload) VALUES ('transactions', json_object(
+                'tx_id', new.tx_id, 'account_id', new.account_id, 'tx_type', new.tx_type,
+                'amount', new.amount, 'status', new.status, 'message', new.message,
+                'timestamp', new.timestamp
+            ));
+        END
+        """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS cdc_audit_log AFTER INSERT ON audit_log BEGIN
+            INSERT INTO cdc_events (source, payload) VALUES ('audit_log', json_object(
+                'id', new.id, 'timestamp', new.timestamp, 'action', new.action,
+                'account_id', new.account_id, 'amount', new.amount, 'status', new.status,
+                'message', new.message
+            ));
+        END
+        """)
+        # account rows too (creation and status changes; balances follow from
+        # transactions), so the feed alone can rebuild the ledger for restores
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS cdc_accounts_insert AFTER INSERT ON accounts BEGIN
+            INSERT INTO cdc_events (source, payload) VALUES ('accounts', json_object(
+                'op', 'insert', 'account_id', new.account_id, 'owner_name', new.owner_name,
+                'account_type', new.account_type, 'status', new.status
+            ));
+        END
+        """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS cdc_accounts_status AFTER UPDATE OF status ON accounts
+        WHEN new.status IS NOT old.status BEGIN
+            INSERT INTO cdc_events (source, payload) VALUES ('accounts', json_object(
+                'op', 'status', 'account_id', new.account_id, 'status', new.status
+            ));
+        END
+        """)
+
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
 # db.py (add below init_db)
 
-from typing import Dict
+from typing import Dict, List
+
+def owner_key(owner_name: str) -> str:
+    """Search form of an owner name: casefolded, so 'ÉMILE' and 'émile' match."""
+    return owner_name.strip().casefold()
+
 
-def save_account(account_dict: Dict):
-    """Insert a new account row."""
+def save_account(account_dict: Dict, ignore_existing: bool = False):
+    """Insert a new account row (or leave an existing one alone with `ignore_existing`)."""
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO accounts (account_id, owner_name, account_type, balance, status)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            account_dict["account_id"],
-            account_dict["owner_name"],
-            account_dict["account_type"],
-            account_dict["balance"],
-            account_dict["status"],
-        ))
+        insert_account_row(conn.cursor(), account_dict, ignore_existing)
+
+
+def insert_account_row(cur, account_dict: Dict, ignore_existing: bool = False):
+    """Insert one account using the caller's cursor/transaction."""
+    cur.execute(f"""
+        INSERT {'OR IGNORE ' if ignore_existing else ''}INTO accounts (account_id, owner_name, account_type, balance, status, owner_key)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        account_dict["account_id"],
+        account_dict["owner_name"],
+        account_dict["account_type"],
+        account_dict["balance"],
+        account_dict["status"],
+        owner_key(account_dict["owner_name"]),
+    ))
 
 
 def update_account_balance(account_id: str, new_balance: float):
@@ -83,21 +440,101 @@ def update_account_balance(account_id: str, new_balance: float):
         """, (new_balance, account_id))
 
 
-def insert_transaction(tx_dict: Dict):
+def adjust_balance_row(cur, account_id: str, delta: float):
+    """Move a balance by `delta` using the caller's cursor/transaction.
+
+    Relative, so postings other writers committed in between are kept.
+    """
+    cur.execute("""
+        UPDATE accounts
+        SET balance = balance + ?
+        WHERE account_id = ?
+    """, (delta, account_id))
+
+
+CREDIT_TX_TYPES = ("DEPOSIT", "TRANSFER_IN", "INTEREST")
+
+
+def signed_amount(tx_dict: Dict) -> float:
+    """Posting amount as it affects the balance: credits positive, debits negative."""
+    return tx_dict["amount"] if tx_dict["tx_type"] in CREDIT_TX_TYPES else -tx_dict["amount"]
+
+
+def insert_transaction(tx_dict: Dict, ignore_existing: bool = False):
     with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO transactions (tx_id, account_id, tx_type, amount, status, message, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            tx_dict["tx_id"],
-            tx_dict["account_id"],
-            tx_dict["tx_type"],
-            tx_dict["amount"],
-            tx_dict["status"],
-            tx_dict["message"],
-            tx_dict["timestamp"],
-        ))
+        insert_transaction_row(conn.cursor(), tx_dict, ignore_existing)
+
+
+def insert_postings(tx_dicts: List[Dict], ignore_existing: bool = False):
+    """Event-sourced write: insert postings and project them onto accounts.balance atomically."""
+    with get_connection() as conn:
+        insert_posting_rows(conn.cursor(), tx_dicts, ignore_existing)
+
+
+def insert_posting_rows(cur, tx_dicts: List[Dict], ignore_existing: bool = False):
+    """Postings plus their balance projection, using the caller's cursor/transaction.
+
+    With `ignore_existing`, postings already present are skipped along with
+    their projection, so a replayed operation is applied once.
+    """
+    for tx_dict in tx_dicts:
+        inserted = insert_transaction_row(cur, tx_dict, ignore_existing)
+        if inserted and tx_dict["status"] == "SUCCESS":
+            adjust_balance_row(cur, tx_dict["account_id"], signed_amount(tx_dict))
+
+
+def insert_transaction_row(cur, tx_dict: Dict, ignore_existing: bool = False) -> bool:
+    """Insert one transaction (and its rollup) using the caller's cursor/transaction.
+
+    Returns False if `ignore_existing` is set and the tx_id is already there.
+    """
+    cur.execute(f"""
+        INSERT {'OR IGNORE ' if ignore_existing else ''}INTO transactions (tx_id, account_id, tx_type, amount, status, message, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (
+        tx_dict["tx_id"],
+        tx_dict["account_id"],
+        tx_dict["tx_type"],
+        tx_dict["amount"],
+        tx_dict["status"],
+        tx_dict["message"],
+        tx_dict["timestamp"],
+    ))
+    if cur.rowcount == 0:
+        return False
+    if tx_dict["status"] == "SUCCESS":
+        upsert_daily_rollup(cur, tx_dict)
+    return True
+
+
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO daily_rollups (day, account_type, tx_type, tx_count, total_amount, min_amount, max_amount)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (day, account_type, tx_type) DO UPDATE SET
+        tx_count = tx_count + excluded.tx_count,
+        total_amount = total_amount + excluded.total_amount,
+        min_amount = MIN(min_amount, excluded.min_amount),
+        max_amount = MAX(max_amount, excluded.max_amount)
+"""
+
+
+def upsert_daily_rollup(cur, tx_dict: Dict):
+    """Fold one successful transaction into daily_rollups (same connection as the insert)."""
+    row = cur.execute(
+        "SELECT account_type FROM accounts WHERE account_id = ?",
+        (tx_dict["account_id"],),
+    ).fetchone()
+    account_type = row[0] if row else "UNKNOWN"
+    amount = tx_dict["amount"]
+    cur.execute(ROLLUP_UPSERT_SQL, (
+        tx_dict["timestamp"][:10],
+        account_type,
+        tx_dict["tx_type"],
+        1,
+        amount,
+        amount,
+        amount,
+    ))
 
 
 def insert_audit_entry(entry: Dict):
@@ -115,10 +552,65 @@ def insert_audit_entry(entry: Dict):
             entry["message"],
         ))
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-def fetch_all_accounts() -> List[Dict]:
+def insert_hold(hold: Dict):
     with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO holds (hold_id, account_id, amount, status, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            hold["hold_id"],
+            hold["account_id"],
+            hold["amount"],
+            hold["status"],
+            hold["created_at"],
+            hold["expires_at"],
+        ))
+
+
+def update_hold_status(hold_id: str, status: str):
+    with get_connection() as conn:
+        update_hold_status_row(conn.cursor(), hold_id, status)
+
+
+def update_hold_status_row(cur, hold_id: str, status: str):
+    cur.execute("""
+        UPDATE holds
+        SET status = ?
+        WHERE hold_id = ?
+    """, (status, hold_id))
+
+
+def expire_holds_before(now: str) -> List[str]:
+    """Mark every OPEN hold with expires_at <= now as EXPIRED; returns their ids.
+
+    Range scan over the partial expiry index, not a full table scan.
+    """
+    with get_connection() as conn:
+        rows = conn.execute("""
+            UPDATE holds
+            SET status = 'EXPIRED'
+            WHERE status = 'OPEN' AND expires_at <= ?
+            RETURNING hold_id
+        """, (now,)).fetchall()
+        return [row[0] for row in rows]
+
+
+def fetch_open_holds(account_id: Optional[str] = None) -> List[Dict]:
+    with get_read_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        if account_id is None:
+            cur = conn.execute("SELECT * FROM holds WHERE status = 'OPEN'")
+        else:
+            cur = conn.execute(
+                "SELECT * FROM holds WHERE account_id = ? AND status = 'OPEN'", (account_id,)
+            )
+        return [dict(row) for row in cur.fetchall()]
+
+
+def fetch_all_accounts() -> List[Dict]:
+    with get_read_connection() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
         cur.execute("SELECT * FROM accounts")
@@ -126,16 +618,96 @@ def fetch_all_accounts() -> List[Dict]:
         return [dict(row) for row in rows]
 
 
+def fetch_account(account_id: str) -> Optional[Dict]:
+    """Get a single account row, or None."""
+    with get_read_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(
+            "SELECT * FROM accounts WHERE account_id = ?", (account_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def transaction_exists(tx_id: str) -> bool:
+    with get_read_connection() as conn:
+        row = conn.execute(
+            "SELECT 1 FROM transactions WHERE tx_id = ?", (tx_id,)
+        ).fetchone()
+        return row is not None
+
+
+def archive_path(relative_path: str) -> str:
+    """Resolve an archive_index path against the directory holding DB_NAME."""
+    return os.path.join(os.path.dirname(os.path.abspath(DB_NAME)), relative_path)
+
+
+def account_archive_paths(conn, account_id: str) -> List[str]:
+    """archive_index paths of the months that hold rows for `account_id`, oldest first."""
+    return [
+        row[0] for row in conn.execute("""
+            SELECT i.path FROM archive_accounts a
+            JOIN archive_index i ON i.month = a.month
+            WHERE a.account_id = ?
+            ORDER BY a.month
+        """, (account_id,))
+    ]
+
+
+def hot_tier_start(conn) -> str:
+    """First day (YYYY-MM-DD) whose transactions are all still in DB_NAME; "" if nothing is archived.
+
+    Archiving moves everything older than a cutoff, so only the newest
+    archived month can overlap the hot tier, and only up to its last row.
+    """
+    row = conn.execute(
+        "SELECT path FROM archive_index WHERE tx_rows > 0 ORDER BY month DESC LIMIT 1"
+    ).fetchone()
+    if row is None:
+        return ""
+    archived = query_archives([row[0]], "SELECT MAX(timestamp) AS ts FROM transactions", ())
+    if not archived or archived[0]["ts"] is None:
+        return ""
+    last_day = datetime.fromisoformat(archived[0]["ts"][:10])
+    return (last_day + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def query_archives(paths: List[str], sql: str, params: tuple) -> List[Dict]:
+    """Run a read-only query against each cold-tier file and concatenate the rows."""
+    out: List[Dict] = []
+    for path in paths:
+        full = archive_path(path)
+        if not os.path.exists(full):
+            continue
+        conn = sqlite3.connect(f"file:{full}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            out.extend(dict(row) for row in conn.execute(sql, params))
+        finally:
+            conn.close()
+    return out
+
+
 def fetch_transactions_for_account(account_id: str) -> List[Dict]:
-    with get_connection() as conn:
+    """All transactions for an account, across the hot DB and any archived months."""
+    with get_read_connection() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
+        paths = account_archive_paths(cur, account_id)
+
         cur.execute(
             "SELECT * FROM transactions WHERE account_id = ? ORDER BY timestamp",
             (account_id,),
         )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        rows = [dict(row) for row in cur.fetchall()]
+
+    if not paths:
+        return rows
+    archived = query_archives(
+        paths,
+        "SELECT * FROM transactions WHERE account_id = ? ORDER BY timestamp",
+        (account_id,),
+    )
+    return sorted(archived + rows, key=lambda tx: tx["timestamp"])
     
 def close_account(account_id: str):
     with get_connection() as conn:
@@ -148,7 +720,7 @@ def close_account(account_id: str):
 
 def get_all_accounts_summary() -> List[Dict]:
     """Get summary of all accounts (id, owner, type, balance, status)."""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
         cur.execute("""
@@ -158,9 +730,80 @@ def get_all_accounts_summary() -> List[Dict]:
         """)
         return [dict(row) for row in cur.fetchall()]
 
+# sortable columns for search_accounts; owner names sort case-insensitively
+ACCOUNT_SORT_KEYS = {
+    "account_id": "account_id",
+    "owner_name": "owner_key",
+    "balance": "balance",
+}
+
+
+def search_accounts(
+    owner_prefix: Optional[str] = None,
+    account_type: Optional[str] = None,
+    status: Optional[str] = None,
+    min_balance: Optional[float] = None,
+    max_balance: Optional[float] = None,
+    sort: str = "account_id",
+    descending: bool = False,
+    limit: int = 50,
+    after: Optional[List] = None,
+) -> Dict:
+    """Find accounts one sorted page at a time.
+
+    `owner_prefix` matches the start of the owner name ignoring case, as an
+    index range on owner_key. Pass the returned `next_after` cursor
+    back as `after` for the following page.
+    """
+    if sort not in ACCOUNT_SORT_KEYS:
+        raise ValueError(f"Cannot sort accounts by {sort}.")
+    key = ACCOUNT_SORT_KEYS[sort]
+    where: List[str] = []
+    params: List = []
+
+    if owner_prefix and owner_prefix.strip():
+        # [prefix, prefix + U+10FFFF) covers every key starting with prefix
+        prefix = owner_key(owner_prefix)
+        where.append("owner_key >= ? AND owner_key < ?")
+        params += [prefix, prefix + "\U0010ffff"]
+    if account_type:
+        where.append("account_type = ?")
+        params.append(account_type.upper())
+    if status:
+        where.append("status = ?")
+        params.append(status.upper())
+    if min_balance is not None:
+        where.append("balance >= ?")
+        params.append(min_balance)
+    if max_balance is not None:
+        where.append("balance <= ?")
+        params.append(max_balance)
+    if after is not None:
+        where.append(f"({key}, account_id) {'<' if descending else '>'} (?, ?)")
+        params += list(after)
+
+    direction = "DESC" if descending else "ASC"
+    sql = f"SELECT account_id, owner_name, account_type, balance, status, {key} AS sort_key FROM accounts"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {key} {direction}, account_id {direction} LIMIT ?"
+    params.append(limit + 1)
+
+    with get_read_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute(sql, params)]
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_after = [rows[-1]["sort_key"], rows[-1]["account_id"]] if has_more else None
+    for row in rows:
+        del row["sort_key"]
+    return {"rows": rows, "next_after": next_after}
+
+
 def get_recent_audit_logs(limit: int = 10) -> List[Dict]:
     """Get the most recent audit entries."""
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
         cur.execute("""
@@ -168,5 +811,212 @@ def get_recent_audit_logs(limit: int = 10) -> List[Dict]:
             ORDER BY id DESC 
             LIMIT ?
         """, (limit,))
+        rows = [dict(row) for row in cur.fetchall()]
+        if len(rows) >= limit:
+            return rows
+        cur.execute("SELECT path FROM archive_index WHERE audit_rows > 0 ORDER BY month DESC")
+        paths = [row["path"] for row in cur.fetchall()]
+
+    # hot tier ran short: continue into archived months, newest first
+    for path in paths:
+        rows.extend(query_archives(
+            [path],
+            "SELECT * FROM audit_log ORDER BY id DESC LIMIT ?",
+            (limit - len(rows),),
+        ))
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def fetch_daily_rollups(since_day: str = "") -> List[Dict]:
+    """Get daily rollup rows from `since_day` (YYYY-MM-DD) onwards."""
+    with get_read_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT * FROM daily_rollups
+            WHERE day >= ?
+            ORDER BY day, account_type, tx_type
+        """, (since_day,))
         return [dict(row) for row in cur.fetchall()]
 
+
+def _fts_query(text: str) -> str:
+    """Quote each word so user input is matched literally (all words must appear)."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def search_audit_logs(
+    text: Optional[str] = None,
+    account_id: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+) -> Dict:
+    """Search audit_log, newest first, one page at a time.
+
+    Pagination is keyset-based: pass the returned `next_before_id` to get the
+    next page, so deep pages cost the same as the first one. When the hot
+    table runs short the search continues into archived months, newest first;
+    archive files have no full-text index, so there `text` matches each word
+    as a substring of the message.
+    """
+    where: List[str] = []
+    params: List = []
+    if account_id:
+        where.append("a.account_id = ?")
+        params.append(account_id)
+    if action:
+        where.append("a.action = ?")
+        params.append(action.upper())
+    if status:
+        where.append("a.status = ?")
+        params.append(status.upper())
+    if min_amount is not None:
+        where.append("a.amount >= ?")
+        params.append(min_amount)
+    if max_amount is not None:
+        where.append("a.amount <= ?")
+        params.append(max_amount)
+    if since:
+        where.append("a.timestamp >= ?")
+        params.append(since)
+    if until:
+        where.append("a.timestamp < ?")
+        params.append(until)
+
+    def page_sql(conditions: List[str], source: str = "audit_log a", key: str = "a.id") -> str:
+        if before_id is not None:
+            conditions = conditions + [f"{key} < ?"]
+        sql = f"SELECT a.* FROM {source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql + f" ORDER BY {key} DESC LIMIT ?"
+
+    paging = [before_id] if before_id is not None else []
+    words = text.split() if text and text.strip() else []
+    hot_sql, hot_params = page_sql(where), params
+    if words and account_id:
+        # one account's rows are few: walk its (account_id, id) index newest
+        # first and probe the FTS index per row
+        hot_sql = page_sql(where + ["EXISTS (SELECT 1 FROM audit_fts f WHERE audit_fts MATCH ? AND f.rowid = a.id)"])
+        hot_params = params + [_fts_query(text)]
+    elif words:
+        # walk the FTS index in rowid order (= audit_log.id), so the newest
+        # matches come out first without sorting every match
+        hot_sql = page_sql(["audit_fts MATCH ?"] + where, "audit_fts f CROSS JOIN audit_log a ON a.id = f.rowid", "f.rowid")
+        hot_params = [_fts_query(text)] + params
+
+    with get_read_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute(hot_sql, hot_params + paging + [limit + 1])]
+        months = []
+        if len(rows) <= limit:
+            months = [dict(row) for row in conn.execute(
+                "SELECT month, path FROM archive_index WHERE audit_rows > 0 ORDER BY month DESC"
+            )]
+
+    # hot tier ran short: continue into archived months that overlap [since, until)
+    cold_where = where + ["a.message LIKE ?"] * len(words)
+    cold_params = params + [f"%{word}%" for word in words]
+    for month in months:
+        if len(rows) > limit:
+            break
+        if (since and month["month"] < since[:7]) or (until and month["month"] > until[:7]):
+            continue
+        rows.extend(query_archives([month["path"]], page_sql(cold_where), tuple(cold_params + paging + [limit + 1 - len(rows)])))
+    rows.sort(key=lambda row: row["id"], reverse=True)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "rows": rows,
+        "next_before_id": rows[-1]["id"] if has_more else None,
+    }
+
+
+# high-water mark of the feed; AUTOINCREMENT keeps it even after every event is pruned
+LATEST_EVENT_SEQ_SQL = "SELECT IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'cdc_events'), 0)"
+
+
+# feed events that bracket a multi-event write: {"mark": "begin"} ... {"mark": "commit"}
+EVENT_GROUP_SOURCE = "txn"
+
+
+def insert_event_mark_row(cur, mark: str):
+    """Append a 'begin'/'commit' bracket to the feed using the caller's cursor/transaction.
+
+    A write transaction's events get consecutive seqs, so a reader replaying
+    the feed (backup.restore) can stop only outside a bracket and never keeps
+    one leg of a transfer without the other.
+    """
+    cur.execute(
+        "INSERT INTO cdc_events (source, payload) VALUES (?, json_object('mark', ?))",
+        (EVENT_GROUP_SOURCE, mark),
+    )
+
+
+def latest_event_seq() -> int:
+    with get_read_connection() as conn:
+        return conn.execute(LATEST_EVENT_SEQ_SQL).fetchone()[0]
+
+
+def fetch_events_after(seq: int, limit: int = 1000) -> List[Dict]:
+    """CDC events with sequence > `seq`, oldest first (primary-key range scan)."""
+    with get_read_connection() as conn:
+        conn.row_factory = sqlite3.Row
+        cur = conn.execute("""
+            SELECT seq, source, payload FROM cdc_events
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (seq, limit))
+        return [
+            {"seq": row["seq"], "source": row["source"], "data": json.loads(row["payload"])}
+            for row in cur.fetchall()
+        ]
+
+
+def get_consumer_offset(consumer: str) -> Optional[int]:
+    with get_read_connection() as conn:
+        row = conn.execute(
+            "SELECT seq FROM cdc_offsets WHERE consumer = ?", (consumer,)
+        ).fetchone()
+        return row[0] if row else None
+
+
+def save_consumer_offset(consumer: str, seq: int):
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO cdc_offsets (consumer, seq, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (consumer) DO UPDATE SET seq = excluded.seq, updated_at = excluded.updated_at
+        """, (consumer, seq, datetime.utcnow().isoformat()))
+
+
+def prune_cdc_events(batch_size: int = 10000) -> int:
+    """Delete events every registered consumer has already processed.
+
+    With no consumers registered nothing needs the history, so everything
+    goes. Deletes in short batches so writers never wait long.
+    """
+    with get_connection() as conn:
+        upto = conn.execute("""
+            SELECT IFNULL((SELECT MIN(seq) FROM cdc_offsets), (SELECT MAX(seq) FROM cdc_events))
+        """).fetchone()[0]
+    deleted = 0
+    while upto:
+        with get_connection() as conn:
+            cur = conn.execute("""
+                DELETE FROM cdc_events
+                WHERE seq IN (SELECT seq FROM cdc_events WHERE seq <= ? ORDER BY seq LIMIT ?)
+            """, (upto, batch_size))
+            deleted += cur.rowcount
+        if cur.rowcount < batch_size:
+            break
+    return deleted
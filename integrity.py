@@ -0,0 +1,269 @@
+# integrity.py
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import db
+from ledger import BALANCE_TOLERANCE, account_ranges, account_scope, balance_mismatches, posting_totals
+
+CONSUMER = "integrity"    # cdc_offsets entry holding the last verified sequence
+REPORT_PATH = "integrity-report.json"
+PAIR_WINDOW = "60 seconds"   # both legs of a transfer are written by one operation
+
+# counterparty account named in a leg's message:
+#   "To ACC-1, new balance=..." / "SO-9 to ACC-1, new balance=..."   (TRANSFER_OUT)
+#   "From ACC-1, new balance=..." / "SO-9 from ACC-1, new balance=..." (TRANSFER_IN)
+_TO = "substr({m}, instr(lower({m}), 'to ') + 3, instr({m}, ',') - instr(lower({m}), 'to ') - 3)"
+_FROM = "substr({m}, instr(lower({m}), 'from ') + 5, instr({m}, ',') - instr(lower({m}), 'from ') - 5)"
+
+# audit actions and the successful transactions each one must have produced;
+# batch jobs (interest, standing orders) post without audit rows, so they are left out
+AUDIT_TX_SQL = {
+    "tx": """
+        SELECT account_id,
+               CASE WHEN tx_type = 'TRANSFER_OUT' THEN 'TRANSFER' ELSE tx_type END,
+               COUNT(*), SUM(amount)
+        FROM transactions
+        WHERE {scope} AND status = 'SUCCESS'
+          AND (tx_type IN ('DEPOSIT', 'WITHDRAW', 'CAPTURE')
+               OR (tx_type = 'TRANSFER_OUT' AND message LIKE 'To %'))
+        GROUP BY 1, 2
+    """,
+    "audit": """
+        SELECT account_id,
+               CASE WHEN action = 'CREATE_ACCOUNT' THEN 'DEPOSIT' ELSE action END,
+               COUNT(*), SUM(amount)
+        FROM audit_log
+        WHERE {scope} AND status = 'SUCCESS'
+          AND (action IN ('DEPOSIT', 'WITHDRAW', 'TRANSFER', 'CAPTURE')
+               OR (action = 'CREATE_ACCOUNT' AND amount > 0))
+        GROUP BY 1, 2
+    """,
+}
+
+
+def _leg_match(side: str, account: str, counterparty: str, amount: str, timestamp: str) -> str:
+    """Condition on alias `o` for the opposite leg of a `side` leg (arguments are SQL expressions)."""
+    if side == "TRANSFER_OUT":
+        other, named = "TRANSFER_IN", _FROM.format(m="o.message")
+        window = f"o.timestamp >= {timestamp} AND o.timestamp <= strftime('%Y-%m-%dT%H:%M:%f', {timestamp}, '+{PAIR_WINDOW}')"
+    else:
+        other, named = "TRANSFER_OUT", _TO.format(m="o.message")
+        window = f"o.timestamp <= {timestamp} AND o.timestamp >= strftime('%Y-%m-%dT%H:%M:%f', {timestamp}, '-{PAIR_WINDOW}')"
+    return f"""
+        o.account_id = {counterparty} AND {window}
+        AND o.tx_type = '{other}' AND o.status = 'SUCCESS'
+        AND o.amount = {amount} AND {named} = {account}
+    """
+
+
+def _unpaired_sql(side: str, scope: str) -> str:
+    """Successful transfer legs in scope with no opposite leg in the same file."""
+    counterparty = (_TO if side == "TRANSFER_OUT" else _FROM).format(m="t.message")
+    return f"""
+        SELECT t.tx_id, t.account_id, {counterparty}, t.amount, t.timestamp
+        FROM transactions t
+        WHERE {scope} AND t.tx_type = '{side}' AND t.status = 'SUCCESS'
+          AND NOT EXISTS (
+              SELECT 1 FROM transactions o
+              WHERE {_leg_match(side, "t.account_id", counterparty, "t.amount", "t.timestamp")}
+          )
+    """
+
+
+def _has_leg(conn, side: str, leg: Tuple) -> bool:
+    """Does this file hold the opposite leg of an unpaired candidate?"""
+    _, account_id, counterparty, amount, timestamp = leg
+    sql = f"SELECT 1 FROM transactions o WHERE {_leg_match(side, '?4', '?1', '?2', '?3')} LIMIT 1"
+    return conn.execute(sql, (counterparty, amount, timestamp, account_id)).fetchone() is not None
+
+
+def _verify_part(db_path: str, archive_paths: List[str], lo: Optional[str], hi: Optional[str],
+                 account_ids: Optional[List[str]] = None) -> Dict:
+    """Worker: every check for one account range (or id list).
+
+    Each file is aggregated with GROUP BY over the account index range, so
+    rows are summed inside SQLite as they stream past and only per-account
+    totals and discrepancies come back to the parent. The live file is read
+    in a single transaction, so all checks see the same snapshot. The
+    balance check is ledger.py's, shared with `python ledger.py verify`.
+    """
+    scope, params = account_scope(lo, hi, account_ids)
+    t_scope, t_params = account_scope(lo, hi, account_ids, "t.account_id")
+    tx_side: Dict[Tuple[str, str], List[float]] = {}
+    audit_side: Dict[Tuple[str, str], List[float]] = {}
+    unpaired: Dict[str, List[Tuple]] = {"TRANSFER_OUT": [], "TRANSFER_IN": []}
+
+    stores = archive_paths + [db_path]
+    conns = [sqlite3.connect(f"file:{path}?mode=ro", uri=True) for path in stores]
+    try:
+        live = conns[-1]
+        live.execute("BEGIN")
+        totals, rows_seen = posting_totals(conns, scope, params)
+        for conn in conns:
+            for side, target in (("tx", tx_side), ("audit", audit_side)):
+                for account_id, category, n, total in conn.execute(AUDIT_TX_SQL[side].format(scope=scope), params):
+                    slot = target.setdefault((account_id, category), [0, 0.0])
+                    slot[0] += n
+                    slot[1] += total
+            for side in unpaired:
+                unpaired[side] += conn.execute(_unpaired_sql(side, t_scope), t_params).fetchall()
+
+        mismatches, accounts = balance_mismatches(live, totals, scope, params)
+        problems: List[Dict] = [
+            {"check": "balance", "account_id": p["account_id"], "stored": p["stored"],
+             "from_transactions": p["from_postings"]}
+            for p in mismatches
+        ]
+
+        for side, legs in unpaired.items():
+            for leg in legs:
+                # the other leg may sit in a different file (archive month boundary)
+                if len(conns) > 1 and any(_has_leg(c, side, leg) for c in conns):
+                    continue
+                problems.append({"check": "transfer_pair", "account_id": leg[1], "tx_id": leg[0],
+                                 "tx_type": side, "counterparty": leg[2], "amount": leg[3],
+                                 "timestamp": leg[4]})
+
+        for key in sorted(set(tx_side) | set(audit_side)):
+            n_tx, total_tx = tx_side.get(key, [0, 0.0])
+            n_audit, total_audit = audit_side.get(key, [0, 0.0])
+            if n_tx != n_audit or abs(total_tx - total_audit) > BALANCE_TOLERANCE:
+                problems.append({"check": "audit", "account_id": key[0], "category": key[1],
+                                 "tx_count": n_tx, "tx_total": total_tx,
+                                 "audit_count": n_audit, "audit_total": total_audit})
+        live.rollback()
+    finally:
+        for conn in conns:
+            conn.close()
+    return {"problems": problems, "accounts": accounts, "transactions": rows_seen}
+
+
+def _identity(problem: Dict) -> Tuple:
+    return problem["check"], problem["account_id"], problem.get("tx_id"), problem.get("category")
+
+
+def _touched_accounts(since_seq: int, batch_size: int = 10000) -> List[str]:
+    """Accounts named by any CDC event after `since_seq` (and by transfer counterparties)."""
+    touched = set()
+    last = since_seq
+    with db.get_read_connection() as conn:
+        while True:
+            rows = conn.execute(
+                f"""
+                SELECT seq, json_extract(payload, '$.account_id'),
+                       CASE WHEN json_extract(payload, '$.tx_type') = 'TRANSFER_OUT'
+                            THEN {_TO.format(m="json_extract(payload, '$.message')")}
+                            WHEN json_extract(payload, '$.tx_type') = 'TRANSFER_IN'
+                            THEN {_FROM.format(m="json_extract(payload, '$.message')")} END
+                FROM cdc_events WHERE seq > ? ORDER BY seq LIMIT ?
+                """,
+                (last, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            for _, account_id, counterparty in rows:
+                touched.update(a for a in (account_id, counterparty) if a)
+            last = rows[-1][0]
+    return sorted(touched)
+
+
+def _chunks(account_ids: List[str], parts: int) -> List[Tuple]:
+    step = max(1, -(-len(account_ids) // parts))
+    return [(None, None, account_ids[i:i + step]) for i in range(0, len(account_ids), step)]
+
+
+def _run_parts(parts: List[Tuple], workers: int, db_path: str, archive_paths: List[str]) -> Dict:
+    """Fan `parts` out over a process pool and merge the worker results."""
+    merged = {"problems": [], "accounts": 0, "transactions": 0}
+    if not parts:
+        return merged
+    with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as pool:
+        futures = [pool.submit(_verify_part, db_path, archive_paths, lo, hi, ids) for lo, hi, ids in parts]
+        for future in futures:
+            result = future.result()
+            merged["problems"].extend(result["problems"])
+            merged["accounts"] += result["accounts"]
+            merged["transactions"] += result["transactions"]
+    return merged
+
+
+def verify(workers: Optional[int] = None, incremental: bool = False, report_path: Optional[str] = REPORT_PATH,
+           confirm: bool = True) -> Dict:
+    """Check balances, transfer pairing and audit agreement; write a JSON report.
+
+    Full mode splits the account key space into ranges for a process pool.
+    Incremental mode only checks accounts named in CDC events since the last
+    verified sequence (falling back to full on the first run). Discrepancies
+    are re-checked once so writes in flight during the scan are not reported.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if db.get_consumer_offset(CONSUMER) is None:
+        incremental = False
+        # register first so events after this point are kept for the next run
+        db.save_consumer_offset(CONSUMER, 0)
+    since = db.get_consumer_offset(CONSUMER)
+
+    with db.get_read_connection() as conn:
+        upto = conn.execute(db.LATEST_EVENT_SEQ_SQL).fetchone()[0]
+        archive_paths = [
+            db.archive_path(path)
+            for (path,) in conn.execute("SELECT path FROM archive_index WHERE tx_rows > 0 OR audit_rows > 0")
+        ]
+        if incremental:
+            parts = _chunks(_touched_accounts(since), workers * 4)
+        else:
+            parts = [(lo, hi, None) for lo, hi in account_ranges(conn, workers * 4)]
+
+    db_path = os.path.abspath(db.DB_NAME)
+    result = _run_parts(parts, workers, db_path, archive_paths)
+    problems = result["problems"]
+    if problems and confirm:
+        flagged = sorted({p["account_id"] for p in problems})
+        again = _run_parts(_chunks(flagged, workers * 4), workers, db_path, archive_paths)["problems"]
+        persistent = {_identity(p) for p in again}
+        problems = [p for p in problems if _identity(p) in persistent]
+
+    db.save_consumer_offset(CONSUMER, max(since, upto))
+    summary: Dict[str, int] = {}
+    for p in problems:
+        summary[p["check"]] = summary.get(p["check"], 0) + 1
+    report = {
+        "mode": "incremental" if incremental else "full",
+        "generated_at": datetime.utcnow().isoformat(),
+        "from_seq": since if incremental else 0,
+        "verified_seq": upto,
+        "accounts_checked": result["accounts"],
+        "transactions_scanned": result["transactions"],
+        "seconds": round(time.perf_counter() - started, 3),
+        "summary": summary,
+        "discrepancies": problems,
+    }
+    if report_path:
+        with open(report_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        os.replace(report_path + ".tmp", report_path)
+    return report
+
+
+if __name__ == "__main__":
+    # usage: python integrity.py [full|incremental] [WORKERS] [REPORT_PATH]
+    db.init_db()
+    mode = sys.argv[1] if len(sys.argv) > 1 else "full"
+    if mode not in ("full", "incremental"):
+        print("usage: python integrity.py [full|incremental] [WORKERS] [REPORT_PATH]")
+        sys.exit(2)
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    path = sys.argv[3] if len(sys.argv) > 3 else REPORT_PATH
+    report = verify(n, incremental=mode == "incremental", report_path=path)
+    print(f"{'✅' if not report['discrepancies'] else '❌'} {report['mode']}: "
+          f"{report['accounts_checked']} accounts, {report['transactions_scanned']} transactions "
+          f"in {report['seconds']}s; discrepancies: {report['summary'] or 'none'} -> {path}")
+    sys.exit(1 if report["discrepancies"] else 0)
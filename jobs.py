@@ -0,0 +1,442 @@
+# jobs.py
+
+import contextlib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import db
+from ledger import account_ranges
+from risk import RiskEngine
+
+CHUNK_SIZE = 10000
+# partitions queue for the write lock behind each other's chunks
+BUSY_TIMEOUT_MS = 60000
+
+# annual rates per account_type; accrual runs once a month
+INTEREST_RATES = {
+    "SAVINGS": 0.04,
+    "CURRENT": 0.0,
+}
+
+
+# ---------- job bookkeeping ----------
+
+def _register_runs(prefix: str, make_ranges: Callable[[object], List[Tuple[str, str]]]) -> List[Tuple[str, str]]:
+    """Partition bounds of the job `prefix`, registering every partition on the first call.
+
+    All job_runs rows are inserted in one SQL transaction before any partition
+    starts, so a crash can never leave a partition that resume does not know about.
+    """
+    with db.get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        ranges = conn.execute(
+            "SELECT range_lo, range_hi FROM job_runs WHERE job_id >= ? AND job_id < ? ORDER BY job_id",
+            (prefix, prefix + "\U0010ffff"),
+        ).fetchall()
+        if ranges:
+            return ranges
+        ranges = make_ranges(conn)
+        started_at = datetime.utcnow().isoformat()
+        conn.executemany(
+            """
+            INSERT INTO job_runs (job_id, status, range_lo, range_hi, started_at)
+            VALUES (?, 'RUNNING', ?, ?, ?)
+            """,
+            [(f"{prefix}{part:03d}", lo, hi, started_at) for part, (lo, hi) in enumerate(ranges)],
+        )
+        return ranges
+
+
+def _start_run(job_id: str) -> Optional[Dict]:
+    """Resume state of a registered job_runs row; None if the job already finished."""
+    with db.get_read_connection() as conn:
+        row = conn.execute(
+            "SELECT status, checkpoint, processed FROM job_runs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+    if row[0] == "DONE":
+        return None
+    return {"checkpoint": row[1], "processed": row[2]}
+
+
+def _finish_run(job_id: str):
+    with db.get_connection() as conn:
+        conn.execute(
+            "UPDATE job_runs SET status = 'DONE', finished_at = ? WHERE job_id = ?",
+            (datetime.utcnow().isoformat(), job_id),
+        )
+
+
+def job_status(prefix: str = "") -> List[Dict]:
+    with db.get_read_connection() as conn:
+        conn.row_factory = db.sqlite3.Row
+        cur = conn.execute(
+            "SELECT * FROM job_runs WHERE job_id >= ? AND job_id < ? ORDER BY job_id",
+            (prefix, prefix + "\U0010ffff"),
+        )
+        return [dict(row) for row in cur.fetchall()]
+
+
+def _sync_bank(bank, deltas: List[Tuple[str, float]]):
+    """Apply the balance changes a batch committed to a live Bank's memory.
+
+    Deltas rather than absolute values, under the Bank's own lock: an operation
+    the Bank has in flight keeps its change and the batch adds to it.
+    """
+    if bank is None:
+        return
+    with bank.lock:
+        for account_id, delta in deltas:
+            account = bank.accounts.get(account_id)
+            if account is not None:
+                account.balance += delta
+
+
+# ---------- interest accrual ----------
+
+def _monthly_rate_sql() -> str:
+    whens = " ".join(f"WHEN '{t}' THEN {rate / 12!r}" for t, rate in INTEREST_RATES.items())
+    return f"CASE account_type {whens} ELSE 0 END"
+
+
+def _accrue_range(period: str, lo: str, hi: str, part: int, chunk_size: int, bank) -> int:
+    """Accrue interest for accounts in [lo, hi), one SQL transaction per chunk.
+
+    The chunk's postings, balance updates, rollups and the checkpoint commit
+    together, so a crash resumes exactly after the last committed chunk.
+    """
+    job_id = f"interest:{period}:{part:03d}"
+    run = _start_run(job_id)
+    if run is None:
+        return 0
+    # first chunk includes `lo` itself; later chunks start after the checkpoint
+    checkpoint = run["checkpoint"]
+    accrued = 0
+
+    while True:
+        timestamp = datetime.utcnow().isoformat()
+        with db.get_connection() as conn:
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            # take the write lock up front: partitions run concurrently and a
+            # deferred read->write upgrade would fail instead of waiting
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.cursor()
+            ids = [row[0] for row in cur.execute(
+                f"""
+                SELECT account_id FROM accounts
+                WHERE account_id {'>' if checkpoint else '>='} ? AND account_id < ?
+                ORDER BY account_id LIMIT ?
+                """,
+                (checkpoint or lo, hi, chunk_size),
+            )]
+            if not ids:
+                break
+            first, last = ids[0], ids[-1]
+
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS accrual (account_id TEXT PRIMARY KEY, account_type TEXT, interest REAL)")
+            cur.execute("DELETE FROM temp.accrual")
+            cur.execute(
+                f"""
+                INSERT INTO temp.accrual
+                SELECT account_id, account_type, ROUND(balance * {_monthly_rate_sql()}, 2)
+                FROM accounts
+                WHERE account_id >= ? AND account_id <= ? AND status = 'ACTIVE' AND balance > 0
+                """,
+                (first, last),
+            )
+            cur.execute("DELETE FROM temp.accrual WHERE interest <= 0")
+            cur.execute(
+                """
+                INSERT INTO transactions (tx_id, account_id, tx_type, amount, status, message, timestamp)
+                SELECT 'INT-' || ? || '-' || account_id, account_id, 'INTEREST', interest, 'SUCCESS', 'Interest ' || ?, ?
+                FROM temp.accrual
+                """,
+                (period, period, timestamp),
+            )
+            cur.execute(
+                """
+                UPDATE accounts
+                SET balance = balance + (SELECT interest FROM temp.accrual a WHERE a.account_id = accounts.account_id)
+                WHERE account_id IN (SELECT account_id FROM temp.accrual)
+                """
+            )
+            cur.execute(
+                """
+                INSERT INTO daily_rollups (day, account_type, tx_type, tx_count, total_amount, min_amount, max_amount)
+                SELECT ?, account_type, 'INTEREST', COUNT(*), SUM(interest), MIN(interest), MAX(interest)
+                FROM temp.accrual
+                GROUP BY account_type
+                ON CONFLICT (day, account_type, tx_type) DO UPDATE SET
+                    tx_count = tx_count + excluded.tx_count,
+                    total_amount = total_amount + excluded.total_amount,
+                    min_amount = MIN(min_amount, excluded.min_amount),
+                    max_amount = MAX(max_amount, excluded.max_amount)
+                """,
+                (timestamp[:10],),
+            )
+            credited = cur.execute("SELECT account_id, interest FROM temp.accrual").fetchall()
+            cur.execute(
+                "UPDATE job_runs SET checkpoint = ?, processed = processed + ? WHERE job_id = ?",
+                (last, len(ids), job_id),
+            )
+        _sync_bank(bank, credited)
+        accrued += len(credited)
+        checkpoint = last
+
+    _finish_run(job_id)
+    return accrued
+
+
+def run_interest_accrual(period: str, bank=None, partitions: int = 1, chunk_size: int = CHUNK_SIZE) -> int:
+    """Accrue one month of interest for `period` (YYYY-MM); returns accounts credited.
+
+    Accounts are split into `partitions` key ranges, each with its own
+    checkpoint, processed by a thread pool. Re-running a finished period is a
+    no-op; re-running an interrupted one resumes from the checkpoints.
+    """
+    # a resumed period keeps the partition bounds it started with
+    ranges = _register_runs(f"interest:{period}:", lambda conn: account_ranges(conn, partitions))
+    if not ranges:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(_accrue_range, period, lo, hi, part, chunk_size, bank)
+            for part, (lo, hi) in enumerate(ranges)
+        ]
+        return sum(f.result() for f in futures)
+
+
+# ---------- standing orders ----------
+
+def add_standing_order(from_account_id: str, to_account_id: str, amount: float, interval_days: int,
+                       first_run: Optional[str] = None) -> str:
+    if amount <= 0 or interval_days <= 0:
+        raise ValueError("Amount and interval must be positive.")
+    if from_account_id == to_account_id:
+        raise ValueError("Cannot transfer to the same account.")
+    order_id = "SO-" + uuid4().hex[:10].upper()
+    with db.get_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO standing_orders (order_id, from_account_id, to_account_id, amount, interval_days, next_run, status)
+            VALUES (?, ?, ?, ?, ?, ?, 'ACTIVE')
+            """,
+            (order_id, from_account_id, to_account_id, amount, interval_days,
+             first_run or datetime.utcnow().isoformat()),
+        )
+    return order_id
+
+
+def _advance(next_run: str, interval_days: int, now: str) -> str:
+    when = datetime.fromisoformat(next_run)
+    while when.isoformat() <= now:
+        when += timedelta(days=interval_days)
+    return when.isoformat()
+
+
+def run_standing_orders(bank=None, chunk_size: int = CHUNK_SIZE, now: Optional[str] = None) -> Dict[str, int]:
+    """Execute every due standing order, one SQL transaction per chunk of orders.
+
+    Advancing next_run commits together with the transfer, so a crashed run
+    simply picks up the orders that are still due. With a live Bank, each
+    chunk holds bank.lock until it has committed and checks funds against the
+    Bank's in-memory available balance: an operation the Bank has debited but
+    not yet written cannot be spent twice.
+    """
+    now = now or datetime.utcnow().isoformat()
+    result = {"executed": 0, "failed": 0}
+    lock = bank.lock if bank is not None else contextlib.nullcontext()
+    # velocity limits: the Bank's windows for accounts it holds, otherwise
+    # windows warmed from each source account's committed history
+    local_risk = RiskEngine(bank.risk.rules if bank is not None else None)
+    warmed = set()
+
+    def risk_for(account_id: str) -> RiskEngine:
+        if bank is not None and account_id in bank.accounts:
+            return bank.risk
+        if account_id not in warmed:
+            local_risk.warm_from_db(account_id)
+            warmed.add(account_id)
+        return local_risk
+
+    while True:
+        with lock, db.get_connection() as conn:
+            conn.row_factory = db.sqlite3.Row
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.cursor()
+            orders = cur.execute(
+                """
+                SELECT * FROM standing_orders
+                WHERE status = 'ACTIVE' AND next_run <= ?
+                ORDER BY next_run LIMIT ?
+                """,
+                (now, chunk_size),
+            ).fetchall()
+            if not orders:
+                break
+
+            ids = {o["from_account_id"] for o in orders} | {o["to_account_id"] for o in orders}
+            marks = ",".join("?" * len(ids))
+            accounts = {
+                row["account_id"]: dict(row)
+                for row in cur.execute(f"SELECT * FROM accounts WHERE account_id IN ({marks})", list(ids))
+            }
+            # spendable funds: the live Bank's view where it has the account, else the DB's
+            funds = {
+                a: bank.accounts[a].get_available_balance() if bank is not None and a in bank.accounts else row["balance"]
+                for a, row in accounts.items()
+            }
+            deltas: Dict[str, float] = {}
+            txs = []
+            flags = []
+            for order in orders:
+                src = accounts.get(order["from_account_id"])
+                dst = accounts.get(order["to_account_id"])
+                amount = order["amount"]
+
+                error = None
+                if src is None or dst is None:
+                    error = "Account not found"
+                elif src["status"] != "ACTIVE" or dst["status"] != "ACTIVE":
+                    error = "Account not active"
+                elif funds[src["account_id"]] < amount:
+                    error = "Insufficient funds."
+                else:
+                    hits = risk_for(src["account_id"]).check(src["account_id"], "TRANSFER_OUT", amount)
+                    error = next((reason for rule, reason in hits if rule.action == "REJECT"), None)
+                    if error is None:
+                        flags += [(order, reason) for rule, reason in hits]
+
+                tx_base = {"amount": amount, "timestamp": now}
+                if error:
+                    txs.append({**tx_base, "tx_id": "TX-" + uuid4().hex[:10].upper(),
+                                "account_id": order["from_account_id"], "tx_type": "TRANSFER_OUT",
+                                "status": "FAILED", "message": f"{order['order_id']}: {error}"})
+                    result["failed"] += 1
+                else:
+                    src["balance"] -= amount
+                    dst["balance"] += amount
+                    funds[src["account_id"]] -= amount
+                    risk_for(src["account_id"]).record(src["account_id"], "TRANSFER_OUT", amount)
+                    funds[dst["account_id"]] += amount
+                    deltas[src["account_id"]] = deltas.get(src["account_id"], 0.0) - amount
+                    deltas[dst["account_id"]] = deltas.get(dst["account_id"], 0.0) + amount
+                    txs.append({**tx_base, "tx_id": "TX-" + uuid4().hex[:10].upper(),
+                                "account_id": src["account_id"], "tx_type": "TRANSFER_OUT", "status": "SUCCESS",
+                                "message": f"{order['order_id']} to {dst['account_id']}, new balance={src['balance']}"})
+                    txs.append({**tx_base, "tx_id": "TX-" + uuid4().hex[:10].upper(),
+                                "account_id": dst["account_id"], "tx_type": "TRANSFER_IN", "status": "SUCCESS",
+                                "message": f"{order['order_id']} from {src['account_id']}, new balance={dst['balance']}"})
+                    result["executed"] += 1
+
+            for account_id, delta in deltas.items():
+                db.adjust_balance_row(cur, account_id, delta)
+            if deltas:
+                # both legs of every transfer reach the feed as one bracket
+                db.insert_event_mark_row(cur, "begin")
+            for tx in txs:
+                db.insert_transaction_row(cur, tx)
+            if deltas:
+                db.insert_event_mark_row(cur, "commit")
+            cur.executemany(
+                "UPDATE standing_orders SET next_run = ? WHERE order_id = ?",
+                [(_advance(o["next_run"], o["interval_days"], now), o["order_id"]) for o in orders],
+            )
+            conn.commit()
+            _sync_bank(bank, list(deltas.items()))
+        if bank is not None:
+            # after the commit: the audit write needs the DB write lock this chunk held
+            for order, reason in flags:
+                bank.audit.log("RISK_FLAG", order["from_account_id"], order["amount"], "SUCCESS",
+                               f"{order['order_id']}: {reason}")
+
+    return result
+
+
+# ---------- scheduler ----------
+
+class JobScheduler:
+    """Runs batch jobs in-process on fixed intervals.
+
+    Call run_pending() from an existing loop, or start() to tick in a daemon
+    thread. Jobs receive the scheduler's Bank so in-memory balances stay in
+    step with what the batch wrote.
+    """
+
+    def __init__(self, bank=None):
+        self.bank = bank
+        self._jobs: List[Dict] = []
+
+    def every(self, seconds: float, name: str, fn: Callable[["JobScheduler"], object]):
+        self._jobs.append({"name": name, "fn": fn, "every": seconds, "next_at": 0.0})
+
+    def run_pending(self) -> List[str]:
+        ran = []
+        now = time.monotonic()
+        for job in self._jobs:
+            if now < job["next_at"]:
+                continue
+            job["next_at"] = now + job["every"]
+            try:
+                job["fn"](self)
+                ran.append(job["name"])
+            except Exception as e:
+                print(f"Job {job['name']} failed: {e}")
+        return ran
+
+    def start(self, tick: float = 1.0) -> threading.Thread:
+        def loop():
+            while True:
+                self.run_pending()
+                time.sleep(tick)
+
+        thread = threading.Thread(target=loop, name="job-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+
+def _previous_month(today: Optional[datetime] = None) -> str:
+    first = (today or datetime.utcnow()).replace(day=1)
+    return (first - timedelta(days=1)).strftime("%Y-%m")
+
+
+def default_scheduler(bank=None) -> JobScheduler:
+    """Standing orders every minute; last month's interest accrual and CDC pruning hourly."""
+    scheduler = JobScheduler(bank)
+    scheduler.every(60, "standing_orders", lambda s: run_standing_orders(s.bank))
+    scheduler.every(3600, "interest_accrual", lambda s: run_interest_accrual(_previous_month(), s.bank))
+    scheduler.every(3600, "cdc_prune", lambda s: db.prune_cdc_events())
+    return scheduler
+
+
+if __name__ == "__main__":
+    # usage: python jobs.py interest [YYYY-MM] [PARTITIONS]
+    #        python jobs.py standing-orders
+    #        python jobs.py add-order FROM_ID TO_ID AMOUNT INTERVAL_DAYS
+    #        python jobs.py status
+    db.init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if command == "interest":
+        period = sys.argv[2] if len(sys.argv) > 2 else _previous_month()
+        parts = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        started = time.perf_counter()
+        n = run_interest_accrual(period, partitions=parts)
+        print(f"✅ Interest for {period}: {n} accounts credited in {time.perf_counter() - started:.1f}s")
+    elif command == "standing-orders":
+        r = run_standing_orders()
+        print(f"✅ Standing orders: {r['executed']} executed, {r['failed']} failed")
+    elif command == "add-order":
+        order_id = add_standing_order(sys.argv[2], sys.argv[3], float(sys.argv[4]), int(sys.argv[5]))
+        print(f"✅ Standing order created: {order_id}")
+    elif command == "status":
+        for run in job_status():
+            print(f"{run['job_id']:<28} {run['status']:<8} processed={run['processed']} checkpoint={run['checkpoint']}")
+    else:
+        print("usage: python jobs.py interest|standing-orders|add-order|status ...")
+        sys.exit(2)
@@ -0,0 +1,291 @@
+# journal.py
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:   # Windows: only journals within this process coordinate
+    fcntl = None
+
+import db
+
+JOURNAL_MAX_BYTES = 4 * 1024 * 1024
+
+
+class _PathLock:
+    """Shared/exclusive lock between the OperationJournals of one process on one path.
+
+    flock() does the same across processes; this covers platforms without it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    def acquire_shared(self):
+        with self._cond:
+            while self._writer:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_shared(self):
+        with self._cond:
+            self._readers -= 1
+            self._cond.notify_all()
+
+    def acquire_exclusive(self, blocking: bool = True) -> bool:
+        with self._cond:
+            while self._writer or self._readers:
+                if not blocking:
+                    return False
+                self._cond.wait()
+            self._writer = True
+            return True
+
+    def release_exclusive(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+_path_locks: Dict[str, _PathLock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def _path_lock(path: str) -> _PathLock:
+    with _path_locks_guard:
+        return _path_locks.setdefault(os.path.abspath(path), _PathLock())
+
+
+class OperationJournal:
+    """Append-only write-ahead journal for multi-step Bank operations.
+
+    Each operation writes an INTENT record (the full list of steps it is
+    about to apply) before touching the DB, and a DONE record afterwards.
+    Records are flushed to the OS on every append, which is enough to survive
+    a process crash; fsync is batched (every `fsync_every` records or
+    `fsync_interval` seconds) to protect against power loss without paying
+    one fsync per operation.
+
+    Several journals (one per Bank, in any number of processes) may share a
+    path. Each holds a shared lock on the file while it has operations in
+    flight; recovery and truncation take it exclusively, so they never see
+    another live Bank's unfinished operation as a crashed one.
+
+    Step kinds:
+        {"kind": "account", "account": {...}}          -> row for save_account
+        {"kind": "balance", "account_id", "before", "after"} -> moves the balance by after - before
+        {"kind": "tx", "tx": {...}}                    -> row for insert_transaction
+        {"kind": "postings", "txs": [...]}             -> insert_postings (event-sourced mode)
+        {"kind": "hold", "hold_id", "account_id", "status"}
+    """
+
+    def __init__(self, path: str = "ops.journal", fsync_every: int = 32, fsync_interval: float = 0.05):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._shared = _path_lock(self.path)
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+    # ---------- locking ----------
+
+    def _enter(self):
+        with self._active_lock:
+            if self._active == 0:
+                self._shared.acquire_shared()
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_SH)
+            self._active += 1
+
+    def _leave(self):
+        with self._active_lock:
+            self._active -= 1
+            if self._active == 0:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                self._shared.release_shared()
+
+    def acquire_exclusive(self, blocking: bool = True) -> bool:
+        """Wait until no journal on this path has an operation in flight, and keep it that way."""
+        if not self._shared.acquire_exclusive(blocking):
+            return False
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                self._shared.release_exclusive()
+                return False
+        return True
+
+    def release_exclusive(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._shared.release_exclusive()
+
+    # ---------- records ----------
+
+    def _append(self, record: Dict):
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = now
+
+    def begin(self, op: str, steps: List[Dict]) -> str:
+        """Record the intent of an operation; returns its op_id."""
+        op_id = os.urandom(16).hex()
+        record = {"op_id": op_id, "type": "INTENT", "op": op, "steps": steps}
+        self._enter()
+        try:
+            self._append(record)
+        except Exception:
+            self._leave()
+            raise
+        self._pending[op_id] = record
+        return op_id
+
+    def complete(self, op_id: str):
+        """Mark an operation done (ours, or one replayed by recovery)."""
+        self._append({"op_id": op_id, "type": "DONE"})
+        if self._pending.pop(op_id, None) is not None:
+            self._leave()
+        if not self._pending and self._file.tell() > JOURNAL_MAX_BYTES and self.acquire_exclusive(blocking=False):
+            try:
+                self.truncate()
+            finally:
+                self.release_exclusive()
+
+    def abandon(self, op_id: str):
+        """Stop tracking an operation that failed midway; its INTENT stays for recovery."""
+        if self._pending.pop(op_id, None) is not None:
+            self._leave()
+
+    def incomplete(self) -> List[Dict]:
+        """INTENT records on disk that have no DONE record."""
+        intents: Dict[str, Dict] = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn final line from a crash mid-write: the op never started
+                    continue
+                if record["type"] == "INTENT":
+                    intents[record["op_id"]] = record
+                else:
+                    intents.pop(record["op_id"], None)
+        return list(intents.values())
+
+    def truncate(self):
+        """Start a fresh journal; call it while holding acquire_exclusive().
+
+        INTENTs without a DONE record (abandoned operations, or those of a
+        crashed process) are carried over, so recovery still finds them.
+        """
+        with self._lock:
+            self._file.flush()
+            keep = self.incomplete()
+            # in place, so every journal sharing the path keeps a valid handle
+            self._file.seek(0)
+            self._file.truncate()
+            for record in keep:
+                self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        """Flush and close; like a process exit, this drops the locks of unfinished operations."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        with self._active_lock:
+            if self._active:
+                self._active = 0
+                self._shared.release_shared()
+
+
+def replay(record: Dict) -> Optional[str]:
+    """Roll an interrupted operation forward to its intended end state.
+
+    An operation's DB steps commit as one SQL transaction, so it either
+    landed completely or not at all; apply_steps() tells the two apart and
+    applies it once. If an account it moves money on no longer exists, the
+    operation is left for manual review and the reason is returned.
+    """
+    steps = record["steps"]
+    created = {s["account"]["account_id"] for s in steps if s["kind"] == "account"}
+    for step in steps:
+        if step["kind"] == "balance" and step["account_id"] not in created and db.fetch_account(step["account_id"]) is None:
+            return f"Account {step['account_id']} missing"
+    apply_steps(steps)
+    return None
+
+
+def _landed(cur, steps: List[Dict]) -> bool:
+    """Has this operation already been applied? Its first inserted row tells."""
+    for step in steps:
+        if step["kind"] == "account":
+            sql, key = "SELECT 1 FROM accounts WHERE account_id = ?", step["account"]["account_id"]
+        elif step["kind"] in ("tx", "postings"):
+            tx = step["tx"] if step["kind"] == "tx" else step["txs"][0]
+            sql, key = "SELECT 1 FROM transactions WHERE tx_id = ?", tx["tx_id"]
+        else:
+            continue
+        return cur.execute(sql, (key,)).fetchone() is not None
+    return False
+
+
+def apply_steps(steps: List[Dict]):
+    """Perform the DB writes described by `steps`, in order, as one SQL transaction.
+
+    Balances move by (after - before) instead of being overwritten, so
+    postings that batch jobs or other processes commit in between are kept.
+    An operation that already landed is skipped as a whole, so replaying it
+    (or racing a replay of it) applies it once.
+    """
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        if _landed(cur, steps):
+            return
+        # rows that reach the change feed; more than one are bracketed there
+        events = sum(
+            len(s["txs"]) if s["kind"] == "postings" else 1
+            for s in steps if s["kind"] in ("account", "tx", "postings")
+        )
+        if events > 1:
+            db.insert_event_mark_row(cur, "begin")
+        for step in steps:
+            if step["kind"] == "account":
+                db.insert_account_row(cur, step["account"], ignore_existing=True)
+            elif step["kind"] == "balance":
+                db.adjust_balance_row(cur, step["account_id"], step["after"] - step["before"])
+            elif step["kind"] == "tx":
+                db.insert_transaction_row(cur, step["tx"], ignore_existing=True)
+            elif step["kind"] == "postings":
+                db.insert_posting_rows(cur, step["txs"], ignore_existing=True)
+            elif step["kind"] == "hold":
+                db.update_hold_status_row(cur, step["hold_id"], step["status"])
+        if events > 1:
+            db.insert_event_mark_row(cur, "commit")
@@ -0,0 +1,156 @@
+# ledger.py
+
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import db
+from reports import SIGNED_AMOUNT
+
+WRITE_CHUNK = 10000
+BALANCE_TOLERANCE = 1e-6
+
+# {scope}: an account range or id list, see account_scope()
+POSTING_SUM_SQL = f"""
+    SELECT account_id, SUM({SIGNED_AMOUNT}), COUNT(*)
+    FROM transactions
+    WHERE {{scope}} AND status = 'SUCCESS'
+    GROUP BY account_id
+"""
+
+
+def account_ranges(conn, parts: int) -> List[Tuple[str, str]]:
+    """Split the account_id key space into roughly equal [lo, hi) ranges."""
+    total = conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+    if total == 0:
+        return []
+    step = max(1, total // parts)
+    bounds = [""]
+    # one streamed pass over the primary key, keeping every step-th id
+    for i, (account_id,) in enumerate(conn.execute("SELECT account_id FROM accounts ORDER BY account_id")):
+        if i and i % step == 0:
+            bounds.append(account_id)
+    bounds.append("\U0010ffff")
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def account_scope(lo: Optional[str], hi: Optional[str], account_ids: Optional[List[str]] = None,
+                  column: str = "account_id") -> Tuple[str, List]:
+    """WHERE fragment + params for an account range or an explicit id list."""
+    if account_ids is not None:
+        return f"{column} IN (SELECT value FROM json_each(?))", [json.dumps(account_ids)]
+    return f"{column} >= ? AND {column} < ?", [lo, hi]
+
+
+def posting_totals(conns: List[sqlite3.Connection], scope: str, params: List) -> Tuple[Dict[str, float], int]:
+    """Net successful postings per account in scope, summed over every file; plus rows scanned.
+
+    A GROUP BY over the (account_id, timestamp) index range per file, so
+    rows are summed inside SQLite and only per-account totals come back.
+    """
+    totals: Dict[str, float] = {}
+    rows = 0
+    for conn in conns:
+        for account_id, net, n in conn.execute(POSTING_SUM_SQL.format(scope=scope), params):
+            totals[account_id] = totals.get(account_id, 0.0) + net
+            rows += n
+    return totals, rows
+
+
+def balance_mismatches(live: sqlite3.Connection, totals: Dict[str, float], scope: str,
+                       params: List) -> Tuple[List[Dict], int]:
+    """Accounts in scope whose stored balance differs from `totals`; plus accounts checked."""
+    problems = []
+    accounts = 0
+    for account_id, balance in live.execute(f"SELECT account_id, balance FROM accounts WHERE {scope}", params):
+        accounts += 1
+        want = totals.get(account_id, 0.0)
+        if abs(balance - want) > BALANCE_TOLERANCE:
+            problems.append({"account_id": account_id, "stored": balance, "from_postings": want})
+    return problems, accounts
+
+
+def _check_range(db_path: str, archive_paths: List[str], lo: str, hi: str) -> List[Dict]:
+    """Worker: accounts in [lo, hi) whose stored balance differs from their postings.
+
+    Runs in a child process with its own read-only connections; the live file
+    is read in one transaction, so postings and balances come from the same
+    snapshot, and only discrepancies travel back to the parent.
+    """
+    scope, params = account_scope(lo, hi)
+    conns = [sqlite3.connect(f"file:{path}?mode=ro", uri=True) for path in archive_paths + [db_path]]
+    try:
+        live = conns[-1]
+        live.execute("BEGIN")
+        totals, _ = posting_totals(conns, scope, params)
+        problems, _ = balance_mismatches(live, totals, scope, params)
+        live.rollback()
+    finally:
+        for conn in conns:
+            conn.close()
+    return problems
+
+
+def verify_projection(workers: Optional[int] = None) -> List[Dict]:
+    """Accounts whose stored balance disagrees with the sum of their postings.
+
+    The account key space is split into ranges that a process pool checks
+    in parallel.
+    """
+    workers = workers or os.cpu_count() or 1
+    with db.get_read_connection() as conn:
+        ranges = account_ranges(conn, workers * 4)
+        archive_paths = [
+            db.archive_path(path)
+            for (path,) in conn.execute("SELECT path FROM archive_index WHERE tx_rows > 0")
+        ]
+
+    problems: List[Dict] = []
+    db_path = os.path.abspath(db.DB_NAME)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_check_range, db_path, archive_paths, lo, hi) for lo, hi in ranges]
+        for future in futures:
+            problems.extend(future.result())
+    return problems
+
+
+def rebuild_balances(workers: Optional[int] = None) -> int:
+    """Overwrite accounts.balance with the postings projection; returns rows changed.
+
+    Run it with writers stopped (or in a maintenance window): postings that
+    land between the aggregate and the write-back would be overwritten.
+    """
+    problems = verify_projection(workers)
+    with db.get_connection() as conn:
+        for i in range(0, len(problems), WRITE_CHUNK):
+            chunk = problems[i:i + WRITE_CHUNK]
+            conn.executemany(
+                "UPDATE accounts SET balance = ? WHERE account_id = ?",
+                [(p["from_postings"], p["account_id"]) for p in chunk],
+            )
+            conn.commit()
+    return len(problems)
+
+
+if __name__ == "__main__":
+    # usage: python ledger.py verify|rebuild [WORKERS]
+    db.init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    if command == "verify":
+        problems = verify_projection(n)
+        if not problems:
+            print("✅ Balances match postings.")
+        else:
+            for p in problems:
+                print(f"❌ {p['account_id']}: stored={p['stored']} postings={p['from_postings']}")
+            sys.exit(1)
+    elif command == "rebuild":
+        print(f"✅ Rebuilt {rebuild_balances(n)} balances from postings.")
+    else:
+        print("usage: python ledger.py verify|rebuild [WORKERS]")
+        sys.exit(2)
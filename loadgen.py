@@ -0,0 +1,335 @@
+# loadgen.py
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import db
+
+# default operation mix for generated traces
+DEFAULT_MIX = {"deposit": 0.35, "withdraw": 0.25, "transfer": 0.15, "balance": 0.2, "create": 0.05}
+
+
+# ---------- traces ----------
+
+def zipf_sampler(n: int, s: float, rng: random.Random):
+    """Return a function drawing account indices 0..n-1 with Zipf(s) popularity."""
+    cum, total = [], 0.0
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** s
+        cum.append(total)
+    return lambda: bisect.bisect_left(cum, rng.random() * total)
+
+
+def generate_trace(path: str, ops: int, accounts: int, zipf_s: float = 1.1,
+                   mix: Optional[Dict[str, float]] = None, seed: int = 0):
+    """Write a synthetic JSONL trace. Accounts are referenced as "@N" (Nth seeded account)."""
+    rng = random.Random(seed)
+    pick = zipf_sampler(accounts, zipf_s, rng)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = list(mix), list(mix.values())
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(ops):
+            op = rng.choices(kinds, weights)[0]
+            rec: Dict = {"op": op}
+            if op == "create":
+                rec.update(owner=f"user{rng.randrange(10**6)}", amount=round(rng.uniform(0, 500), 2))
+            else:
+                rec["account"] = f"@{pick()}"
+            if op in ("deposit", "withdraw", "transfer"):
+                rec["amount"] = round(rng.uniform(1, 200), 2)
+            if op == "transfer":
+                rec["to"] = f"@{pick()}"
+            f.write(json.dumps(rec) + "\n")
+
+
+def load_trace(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ---------- targets ----------
+
+class BankTarget:
+    """Replays operations against an in-process Bank.
+
+    Calls run concurrently: Bank only locks its in-memory balance updates, so
+    workers overlap on the DB, audit and journal paths. A Bank validates
+    against its own in-memory balances, so with --mode processes (one Bank per
+    process, in either ledger mode) withdrawals can overdraw accounts another
+    process has debited: that mode measures throughput and contention, not
+    balance invariants.
+    """
+
+    def __init__(self, bank, account_pool: List[str]):
+        self.bank = bank
+        self.pool = account_pool
+
+    def _resolve(self, ref: str) -> str:
+        return self.pool[int(ref[1:]) % len(self.pool)] if ref.startswith("@") else ref
+
+    def __call__(self, rec: Dict):
+        op = rec["op"]
+        if op == "create":
+            self.bank.create_account(rec.get("owner", "load"), rec.get("type", "SAVINGS"), rec.get("amount", 0.0))
+        elif op == "deposit":
+            self.bank.deposit(self._resolve(rec["account"]), rec["amount"])
+        elif op == "withdraw":
+            self.bank.withdraw(self._resolve(rec["account"]), rec["amount"])
+        elif op == "transfer":
+            self.bank.transfer(self._resolve(rec["account"]), self._resolve(rec["to"]), rec["amount"])
+        elif op == "balance":
+            self.bank.check_balance(self._resolve(rec["account"]))
+        else:
+            raise ValueError(f"Unknown op {op}")
+
+
+class HttpTarget:
+    """POSTs each operation as JSON to `{base_url}/{op}` on an HTTP front end."""
+
+    def __init__(self, base_url: str, account_pool: List[str], timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.pool = account_pool
+        self.timeout = timeout
+
+    def __call__(self, rec: Dict):
+        body = {k: (self.pool[int(v[1:]) % len(self.pool)] if isinstance(v, str) and v.startswith("@") and self.pool else v)
+                for k, v in rec.items()}
+        request = urllib.request.Request(
+            f"{self.base_url}/{rec['op']}", data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"HTTP {response.status}")
+
+
+def seed_accounts(bank, n: int, balance: float = 10000.0) -> List[str]:
+    """Make sure at least `n` accounts exist; returns their ids in a stable order."""
+    ids = sorted(bank.accounts)
+    for i in range(len(ids), n):
+        ids.append(bank.create_account(f"load{i}", "SAVINGS", balance).account_id)
+    return ids[:n]
+
+
+# ---------- measurement ----------
+
+class LockWaitProbe:
+    """Samples how long a writer has to wait for the SQLite write lock.
+
+    A side connection repeatedly runs BEGIN IMMEDIATE / ROLLBACK; the time to
+    get through BEGIN IMMEDIATE is the lock wait any writer would see then.
+    """
+
+    def __init__(self, path: str, interval: float = 0.01):
+        self.path = path
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                conn.execute("BEGIN IMMEDIATE")
+                self.samples.append(time.perf_counter() - started)
+                conn.execute("ROLLBACK")
+                self._stop.wait(self.interval)
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="lock-probe", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def _run_one(target, rec: Dict, scheduled: Optional[float], results: List):
+    # open loop: latency from the scheduled arrival, so queueing counts;
+    # closed loop (no schedule): from dispatch, i.e. the operation alone
+    started = time.perf_counter() if scheduled is None else scheduled
+    try:
+        target(rec)
+        results.append((rec["op"], time.perf_counter() - started, None))
+    except Exception as e:
+        results.append((rec["op"], time.perf_counter() - started, type(e).__name__))
+
+
+def _arrivals(n: int, rate: Optional[float], start: float, rng: random.Random) -> Iterable[float]:
+    """Open-loop Poisson arrival times (or all-at-once when rate is None)."""
+    t = start
+    for _ in range(n):
+        if rate:
+            t += rng.expovariate(rate)
+        yield t
+
+
+def run_threads(target, trace: List[Dict], workers: int, rate: Optional[float], seed: int = 0) -> List:
+    results: List = []
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for rec, at in zip(trace, _arrivals(len(trace), rate, start, rng)):
+            delay = at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_run_one, target, rec, at if rate else None, results)
+    return results
+
+
+def run_asyncio(target, trace: List[Dict], workers: int, rate: Optional[float], seed: int = 0) -> List:
+    results: List = []
+    rng = random.Random(seed)
+
+    async def main():
+        limit = asyncio.Semaphore(workers)
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        tasks = []
+
+        async def one(rec, at):
+            async with limit:
+                await loop.run_in_executor(None, _run_one, target, rec, at if rate else None, results)
+
+        for rec, at in zip(trace, _arrivals(len(trace), rate, start, rng)):
+            delay = at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(rec, at)))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    return results
+
+
+def make_bank(db_name: str, event_sourced: bool, worker: int = 0):
+    """A Bank on the load-test database with its own operation journal."""
+    from bank import Bank
+    from journal import OperationJournal
+    return Bank("LoadGen", event_sourced=event_sourced,
+                journal=OperationJournal(f"{db_name}.{worker}.journal"))
+
+
+def _process_worker(db_name: str, target_url: Optional[str], event_sourced: bool, pool_ids: List[str],
+                    shard: List[Dict], rate: Optional[float], seed: int, worker: int) -> List:
+    """Child process: its own Bank (or HTTP client) replaying one shard of the trace."""
+    db.DB_NAME = db_name
+    if target_url:
+        return run_threads(HttpTarget(target_url, pool_ids), shard, 1, rate, seed)
+    bank = make_bank(db_name, event_sourced, worker)
+    try:
+        return run_threads(BankTarget(bank, pool_ids), shard, 1, rate, seed)
+    finally:
+        bank.close()
+
+
+def run_processes(db_name: str, target_url: Optional[str], event_sourced: bool, pool_ids: List[str],
+                  trace: List[Dict], workers: int, rate: Optional[float], seed: int = 0) -> List:
+    shards = [trace[i::workers] for i in range(workers)]
+    per_rate = rate / workers if rate else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_process_worker, db_name, target_url, event_sourced, pool_ids, shard, per_rate, seed + i, i + 1)
+            for i, shard in enumerate(shards)
+        ]
+        return list(itertools.chain.from_iterable(f.result() for f in futures))
+
+
+def summarize(results: List, elapsed: float, lock_waits: List[float]) -> Dict:
+    latencies = sorted(r[1] for r in results)
+    errors: Dict[str, int] = {}
+    by_op: Dict[str, Dict] = {}
+    for op, _, err in results:
+        stats = by_op.setdefault(op, {"count": 0, "errors": 0})
+        stats["count"] += 1
+        if err:
+            stats["errors"] += 1
+            errors[err] = errors.get(err, 0) + 1
+    waits = sorted(lock_waits)
+    return {
+        "ops": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ops_s": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {p: round(percentile(latencies, p) * 1000, 3) for p in (50, 90, 99)}
+                      | {"max": round(latencies[-1] * 1000, 3) if latencies else 0.0},
+        "error_rate": round(sum(errors.values()) / len(results), 4) if results else 0.0,
+        "errors": errors,
+        "by_op": by_op,
+        "lock_wait_ms": {p: round(percentile(waits, p) * 1000, 3) for p in (50, 99)}
+                        | {"max": round(waits[-1] * 1000, 3) if waits else 0.0, "samples": len(waits)},
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay JSONL request traces against Bank or an HTTP front end.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="write a synthetic trace")
+    gen.add_argument("path")
+    gen.add_argument("--ops", type=int, default=10000)
+    gen.add_argument("--accounts", type=int, default=1000)
+    gen.add_argument("--zipf", type=float, default=1.1, help="popularity skew (0 = uniform)")
+    gen.add_argument("--seed", type=int, default=0)
+
+    run = sub.add_parser("run", help="replay a trace and report")
+    run.add_argument("path")
+    run.add_argument("--mode", choices=["threads", "processes", "asyncio"], default="threads")
+    run.add_argument("--workers", type=int, default=8)
+    run.add_argument("--rate", type=float, default=None, help="open-loop arrivals per second (default: as fast as possible)")
+    run.add_argument("--accounts", type=int, default=1000, help="accounts to seed for @N references")
+    run.add_argument("--db", default="loadtest.db", help="database file (keep load off bank.db)")
+    run.add_argument("--target", default="bank", help="'bank' or an HTTP base URL")
+    run.add_argument("--event-sourced", action="store_true", help="run the Bank in event-sourced ledger mode")
+    run.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        generate_trace(args.path, args.ops, args.accounts, args.zipf, seed=args.seed)
+        print(f"✅ Wrote {args.ops} operations to {args.path}")
+        return
+
+    db.DB_NAME = args.db
+    db.init_db()
+    bank = make_bank(args.db, args.event_sourced)
+    pool_ids = seed_accounts(bank, args.accounts)
+    trace = load_trace(args.path)
+    url = None if args.target == "bank" else args.target
+    target = HttpTarget(url, pool_ids) if url else BankTarget(bank, pool_ids)
+
+    with LockWaitProbe(args.db) as probe:
+        started = time.perf_counter()
+        if args.mode == "threads":
+            results = run_threads(target, trace, args.workers, args.rate, args.seed)
+        elif args.mode == "asyncio":
+            results = run_asyncio(target, trace, args.workers, args.rate, args.seed)
+        else:
+            results = run_processes(args.db, url, args.event_sourced, pool_ids, trace, args.workers, args.rate, args.seed)
+        elapsed = time.perf_counter() - started
+    bank.close()
+
+    print(json.dumps(summarize(results, elapsed, probe.samples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,53 @@
-from menu import run_cli
+import sys
+
 import db
 
+
+def run_command(argv):
+    """One-shot mode, e.g. `python main.py balance ACC-1A2B3C4D`.
+
+    The Bank is built with preload=False, so only the accounts named on the
+    command line are read; the interactive menu is never imported.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="ledger", description="Non-interactive bank commands.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("balance", help="print an account's balance")
+    p.add_argument("account_id")
+    for name in ("deposit", "withdraw"):
+        p = sub.add_parser(name, help=f"{name} into/from an account")
+        p.add_argument("account_id")
+        p.add_argument("amount", type=float)
+    p = sub.add_parser("transfer", help="move money between two accounts")
+    p.add_argument("from_account_id")
+    p.add_argument("to_account_id")
+    p.add_argument("amount", type=float)
+    args = parser.parse_args(argv)
+
+    from bank import Bank
+    bank = Bank("ProjectBank", preload=False)
+    try:
+        if args.command == "balance":
+            print(f"{args.account_id}: {bank.check_balance(args.account_id):.2f}")
+        elif args.command == "deposit":
+            print(f"New balance: {bank.deposit(args.account_id, args.amount):.2f}")
+        elif args.command == "withdraw":
+            print(f"New balance: {bank.withdraw(args.account_id, args.amount):.2f}")
+        else:
+            bank.transfer(args.from_account_id, args.to_account_id, args.amount)
+            print(f"Transferred {args.amount:.2f} from {args.from_account_id} to {args.to_account_id}")
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0] if e.args else e}", file=sys.stderr)
+        return 1
+    finally:
+        bank.close()
+    return 0
+
+
 if __name__ == "__main__":
-    db.init_db()   # make sure tables exist
-    run_cli()
\ No newline at end of file
+    db.init_db()   # make sure tables exist (no-op once the schema version matches)
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
+    from menu import run_cli
+    run_cli()
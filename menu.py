@@ -37,6 +37,26 @@ def get_menu_choice() -> str:
     return choice
 
 
+def browse_accounts(page_size: int = 20, **filters):
+    """Print matching accounts a page at a time (Enter = next page, q = stop)."""
+    after = None
+    while True:
+        page = db.search_accounts(**filters, limit=page_size, after=after)
+        if not page["rows"] and after is None:
+            print("No accounts match.")
+            return
+        print(f"{'ID':<12} {'Owner':<15} {'Type':<10} {'Balance':<12} {'Status'}")
+        print("-" * 65)
+        for acc in page["rows"]:
+            print(
+                f"{acc['account_id']:<12} {acc['owner_name']:<15} "
+                f"{acc['account_type']:<10} ${acc['balance']:<11.2f} {acc['status']}"
+            )
+        after = page["next_after"]
+        if after is None or input("More? (Enter = next page, q = stop): ").strip().lower() == "q":
+            return
+
+
 def run_cli():
     bank = Bank("ProjectBank")
 
@@ -51,6 +71,7 @@ def run_cli():
         print("7. Close Account")
         print("8. Bank Reports Dashboard")
         print("9. Transfer Between Accounts")
+        print("10. Find Accounts by Owner")
         print("0. Exit")
 
         choice = get_menu_choice()
@@ -124,17 +145,9 @@ def run_cli():
             print(f"💰 Total Balance: ${summary['total_balance']:,.2f}")
             print(f"📈 Avg Balance: ${summary['avg_balance']:,.2f}")
 
-            # All accounts table
-            accounts = db.get_all_accounts_summary()
-            if accounts:
-                print("\n--- ALL ACCOUNTS ---")
-                print(f"{'ID':<12} {'Owner':<15} {'Type':<10} {'Balance':<12} {'Status'}")
-                print("-" * 65)
-                for acc in accounts:
-                    print(
-                        f"{acc['account_id']:<12} {acc['owner_name']:<15} "
-                        f"{acc['account_type']:<10} ${acc['balance']:<11.2f} {acc['status']}"
-                    )
+            # Accounts, a page at a time
+            print("\n--- ALL ACCOUNTS ---")
+            browse_accounts()
 
             # Recent audit
             recent_audit = db.get_recent_audit_logs(5)
@@ -156,8 +169,15 @@ def run_cli():
             except Exception as e:
                 print(f"❌ Error: {e}")
 
+        elif choice == "10":
+            prefix = input("Owner name starts with: ").strip()
+            acc_type = input("Account type (SAVINGS/CURRENT, blank = any): ").strip() or None
+            status = input("Status (ACTIVE/CLOSED, blank = any): ").strip() or None
+            browse_accounts(owner_prefix=prefix, account_type=acc_type, status=status, sort="owner_name")
+
         elif choice == "0":
             print("👋 Exiting. Goodbye!")
+            bank.close()
             break
 
         else:
@@ -0,0 +1,243 @@
+# reports.py
+
+import sqlite3
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import db
+
+CHUNK_SIZE = 5000
+
+# credits are positive, debits negative
+SIGNED_AMOUNT = (
+    "CASE WHEN tx_type IN (" + ", ".join(f"'{t}'" for t in db.CREDIT_TX_TYPES) + ") THEN amount ELSE -amount END"
+)
+
+
+def period_bounds(period: str) -> Tuple[str, str]:
+    """Return the [start, end) ISO timestamp bounds for a 'YYYY-MM' or 'YYYY-MM-DD' period."""
+    parts = [int(p) for p in period.split("-")]
+    if len(parts) == 2:
+        year, month = parts
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+    elif len(parts) == 3:
+        start = date(*parts)
+        end = start + timedelta(days=1)
+    else:
+        raise ValueError("Period must be YYYY-MM or YYYY-MM-DD.")
+    return start.isoformat(), end.isoformat()
+
+
+class ReportEngine:
+    """Statement and report generation with per-(report, period) caching.
+
+    All aggregation happens inside SQLite (GROUP BY over indexed ranges), so
+    memory stays bounded no matter how large `transactions` grows. Cached
+    results remember the last rowid they have seen; a lookup only scans rows
+    inserted since then to decide whether the period was touched.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple, Dict] = {}
+
+    # ---------- cache ----------
+
+    def _cached(
+        self,
+        key: Tuple,
+        start: str,
+        end: str,
+        compute: Callable[[sqlite3.Connection], object],
+        account_id: Optional[str] = None,
+        uses_audit: bool = False,
+    ):
+        with db.get_read_connection(analytics=True) as conn:
+            conn.row_factory = sqlite3.Row
+            tx_mark = conn.execute("SELECT IFNULL(MAX(rowid), 0) FROM transactions").fetchone()[0]
+            audit_mark = conn.execute("SELECT IFNULL(MAX(id), 0) FROM audit_log").fetchone()[0]
+
+            entry = self._cache.get(key)
+            if entry is not None and not self._is_stale(conn, entry, start, end, account_id, uses_audit):
+                entry["tx_mark"] = tx_mark
+                entry["audit_mark"] = audit_mark
+                return entry["result"]
+
+            result = compute(conn)
+            self._cache[key] = {"result": result, "tx_mark": tx_mark, "audit_mark": audit_mark}
+            return result
+
+    def _is_stale(self, conn, entry: Dict, start: str, end: str, account_id: Optional[str], uses_audit: bool) -> bool:
+        """True if rows inserted after the entry was computed fall into [start, end)."""
+        sql = "SELECT 1 FROM transactions WHERE rowid > ? AND timestamp >= ? AND timestamp < ?"
+        params: list = [entry["tx_mark"], start, end]
+        if account_id is not None:
+            sql += " AND account_id = ?"
+            params.append(account_id)
+        if conn.execute(sql + " LIMIT 1", params).fetchone():
+            return True
+
+        if uses_audit:
+            row = conn.execute(
+                "SELECT 1 FROM audit_log WHERE id > ? AND timestamp >= ? AND timestamp < ? LIMIT 1",
+                (entry["audit_mark"], start, end),
+            ).fetchone()
+            if row:
+                return True
+        return False
+
+    def invalidate(self, period: Optional[str] = None):
+        """Drop cached results for one period (or everything)."""
+        if period is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[1] == period]:
+            del self._cache[key]
+
+    # ---------- reports ----------
+
+    def monthly_statement(self, account_id: str, period: str) -> Dict:
+        """Opening/closing balance and credit/debit totals for one account and month."""
+        start, end = period_bounds(period)
+
+        def compute(conn):
+            sql = f"""
+                SELECT
+                    IFNULL(SUM(CASE WHEN status = 'SUCCESS' AND timestamp < ? THEN {SIGNED_AMOUNT} END), 0) AS opening,
+                    SUM(CASE WHEN status = 'SUCCESS' AND timestamp >= ? AND {SIGNED_AMOUNT} > 0 THEN amount ELSE 0 END) AS credits,
+                    SUM(CASE WHEN status = 'SUCCESS' AND timestamp >= ? AND {SIGNED_AMOUNT} < 0 THEN amount ELSE 0 END) AS debits,
+                    SUM(CASE WHEN timestamp >= ? THEN 1 ELSE 0 END) AS tx_count,
+                    SUM(CASE WHEN status = 'FAILED' AND timestamp >= ? THEN 1 ELSE 0 END) AS failed_count
+                FROM transactions
+                WHERE account_id = ? AND timestamp < ?
+            """
+            params = (start, start, start, start, start, account_id, end)
+            # months moved to the cold tier still count towards the opening balance
+            rows = [dict(conn.execute(sql, params).fetchone())]
+            rows += db.query_archives(db.account_archive_paths(conn, account_id), sql, params)
+            row = {key: sum(r[key] or 0 for r in rows) for key in rows[0]}
+            opening = row["opening"]
+
+            credits = row["credits"] or 0.0
+            debits = row["debits"] or 0.0
+            return {
+                "account_id": account_id,
+                "period": period,
+                "opening_balance": opening,
+                "credits": credits,
+                "debits": debits,
+                "closing_balance": opening + credits - debits,
+                "tx_count": row["tx_count"],
+                "failed_count": row["failed_count"] or 0,
+            }
+
+        # the opening balance depends on every earlier row, so watch from the beginning
+        return self._cached(("statement", period, account_id), "", end, compute, account_id=account_id)
+
+    def iter_statement_lines(self, account_id: str, period: str) -> Iterator[Dict]:
+        """Stream the transactions of a statement in chunks instead of loading them all."""
+        start, end = period_bounds(period)
+        with db.get_read_connection(analytics=True) as conn:
+            conn.row_factory = sqlite3.Row
+            cur = conn.execute(
+                """
+                SELECT * FROM transactions
+                WHERE account_id = ? AND timestamp >= ? AND timestamp < ?
+                ORDER BY timestamp
+                """,
+                (account_id, start, end),
+            )
+            while True:
+                rows = cur.fetchmany(CHUNK_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+    def daily_flows(self, period: str) -> List[Dict]:
+        """Daily successful inflow/outflow per tx_type."""
+        start, end = period_bounds(period)
+
+        def compute(conn):
+            cur = conn.execute(
+                f"""
+                SELECT
+                    substr(timestamp, 1, 10) AS day,
+                    tx_type,
+                    CASE WHEN {SIGNED_AMOUNT} > 0 THEN 'INFLOW' ELSE 'OUTFLOW' END AS direction,
+                    COUNT(*) AS tx_count,
+                    SUM(amount) AS total_amount
+                FROM transactions
+                WHERE status = 'SUCCESS' AND timestamp >= ? AND timestamp < ?
+                GROUP BY day, tx_type
+                ORDER BY day, tx_type
+                """,
+                (start, end),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+        return self._cached(("daily_flows", period), start, end, compute)
+
+    def top_accounts(self, period: str, limit: int = 10) -> List[Dict]:
+        """Accounts with the highest successful volume in the period."""
+        start, end = period_bounds(period)
+
+        def compute(conn):
+            cur = conn.execute(
+                """
+                SELECT account_id, COUNT(*) AS tx_count, SUM(amount) AS volume
+                FROM transactions
+                WHERE status = 'SUCCESS' AND timestamp >= ? AND timestamp < ?
+                GROUP BY account_id
+                ORDER BY volume DESC
+                LIMIT ?
+                """,
+                (start, end, limit),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+        return self._cached(("top_accounts", period, limit), start, end, compute)
+
+    def failure_rates(self, period: str) -> Dict[str, List[Dict]]:
+        """Failure counts and rates per tx_type (transactions) and per action (audit_log)."""
+        start, end = period_bounds(period)
+
+        def compute(conn):
+            tx_rows = conn.execute(
+                """
+                SELECT
+                    tx_type,
+                    COUNT(*) AS total,
+                    SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) AS failed
+                FROM transactions
+                WHERE timestamp >= ? AND timestamp < ?
+                GROUP BY tx_type
+                ORDER BY tx_type
+                """,
+                (start, end),
+            ).fetchall()
+            audit_rows = conn.execute(
+                """
+                SELECT
+                    action,
+                    COUNT(*) AS total,
+                    SUM(CASE WHEN status = 'FAILED' THEN 1 ELSE 0 END) AS failed
+                FROM audit_log
+                WHERE timestamp >= ? AND timestamp < ?
+                GROUP BY action
+                ORDER BY action
+                """,
+                (start, end),
+            ).fetchall()
+
+            def with_rate(rows):
+                out = []
+                for row in rows:
+                    rec = dict(row)
+                    rec["failure_rate"] = rec["failed"] / rec["total"] if rec["total"] else 0.0
+                    out.append(rec)
+                return out
+
+            return {"transactions": with_rate(tx_rows), "audit": with_rate(audit_rows)}
+
+        return self._cached(("failure_rates", period), start, end, compute, uses_audit=True)
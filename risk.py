@@ -0,0 +1,156 @@
+# risk.py
+
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import db
+
+RESOLUTION = 60   # buckets per window: a 24h window moves in 24-minute steps
+
+
+class VelocityRule:
+    """Limit on successful `tx_type` activity per account within `window` seconds."""
+
+    def __init__(self, tx_type: str, window: int, max_amount: Optional[float] = None,
+                 max_count: Optional[int] = None, action: str = "REJECT"):
+        if (max_amount is None) == (max_count is None):
+            raise ValueError("Give exactly one of max_amount or max_count.")
+        self.tx_type = tx_type.upper()
+        self.window = window
+        self.max_amount = max_amount
+        self.max_count = max_count
+        self.action = action.upper()    # REJECT or FLAG
+
+    def describe(self) -> str:
+        hours = self.window / 3600
+        span = f"{hours:g}h" if hours >= 1 else f"{self.window / 60:g}m"
+        if self.max_amount is not None:
+            return f"{self.tx_type} over {self.max_amount} per {span}"
+        return f"{self.tx_type} more than {self.max_count}x per {span}"
+
+
+# debits counted against another type's rules: a captured hold is a withdrawal
+COUNTS_AS = {"CAPTURE": "WITHDRAW"}
+
+DEFAULT_RULES = [
+    VelocityRule("WITHDRAW", 24 * 3600, max_amount=50000.0),
+    VelocityRule("TRANSFER_OUT", 24 * 3600, max_amount=100000.0),
+    VelocityRule("WITHDRAW", 3600, max_count=20, action="FLAG"),
+]
+
+
+class SlidingWindow:
+    """Approximate sliding-window sum/count with fixed-size time buckets.
+
+    Each update touches only the newest bucket and evicts expired ones from
+    the front, keeping running totals, so add() and totals() are O(1)
+    amortized no matter how much history the window covers.
+    """
+
+    __slots__ = ("window", "step", "buckets", "amount", "count")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.step = max(1.0, window / RESOLUTION)
+        self.buckets: deque = deque()   # [bucket_no, amount, count]
+        self.amount = 0.0
+        self.count = 0
+
+    def _evict(self, now: float):
+        oldest = int((now - self.window) // self.step)
+        while self.buckets and self.buckets[0][0] <= oldest:
+            _, amount, count = self.buckets.popleft()
+            self.amount -= amount
+            self.count -= count
+
+    def add(self, amount: float, now: float):
+        self._evict(now)
+        bucket_no = int(now // self.step)
+        if self.buckets and self.buckets[-1][0] == bucket_no:
+            self.buckets[-1][1] += amount
+            self.buckets[-1][2] += 1
+        else:
+            self.buckets.append([bucket_no, amount, 1])
+        self.amount += amount
+        self.count += 1
+
+    def totals(self, now: float) -> Tuple[float, int]:
+        self._evict(now)
+        return self.amount, self.count
+
+
+class RiskEngine:
+    """Per-account velocity checks backed by in-memory sliding windows."""
+
+    def __init__(self, rules: Optional[List[VelocityRule]] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self._windows_by_type: Dict[str, List[int]] = {}
+        for rule in self.rules:
+            sizes = self._windows_by_type.setdefault(rule.tx_type, [])
+            if rule.window not in sizes:
+                sizes.append(rule.window)
+        # (account_id, tx_type) -> {window_seconds: SlidingWindow}
+        self._counters: Dict[Tuple[str, str], Dict[int, SlidingWindow]] = {}
+
+    def _windows(self, account_id: str, tx_type: str) -> Optional[Dict[int, SlidingWindow]]:
+        sizes = self._windows_by_type.get(tx_type)
+        if not sizes:
+            return None
+        key = (account_id, tx_type)
+        windows = self._counters.get(key)
+        if windows is None:
+            windows = self._counters[key] = {w: SlidingWindow(w) for w in sizes}
+        return windows
+
+    def check(self, account_id: str, tx_type: str, amount: float, now: Optional[float] = None) -> List[Tuple[VelocityRule, str]]:
+        """Rules that `amount` more of `tx_type` would break, with a reason for each."""
+        if tx_type not in self._windows_by_type:
+            return []
+        now = time.time() if now is None else now
+        windows = self._windows(account_id, tx_type)
+        hits = []
+        for rule in self.rules:
+            if rule.tx_type != tx_type:
+                continue
+            total, count = windows[rule.window].totals(now)
+            if rule.max_amount is not None and total + amount > rule.max_amount:
+                hits.append((rule, f"Velocity limit: {rule.describe()} (would be {total + amount})"))
+            elif rule.max_count is not None and count + 1 > rule.max_count:
+                hits.append((rule, f"Velocity limit: {rule.describe()} (would be {count + 1})"))
+        return hits
+
+    def record(self, account_id: str, tx_type: str, amount: float, now: Optional[float] = None):
+        """Count a successful operation."""
+        windows = self._windows(account_id, tx_type)
+        if windows is None:
+            return
+        now = time.time() if now is None else now
+        for window in windows.values():
+            window.add(amount, now)
+
+    def warm_from_db(self, account_id: Optional[str] = None):
+        """Replay recent successful transactions so limits survive a restart.
+
+        With `account_id`, only that account's history is read.
+        """
+        if not self._windows_by_type:
+            return
+        longest = max(rule.window for rule in self.rules)
+        since = (datetime.utcnow() - timedelta(seconds=longest)).isoformat()
+        types = list(self._windows_by_type) + [t for t, rule_type in COUNTS_AS.items() if rule_type in self._windows_by_type]
+        marks = ",".join("?" * len(types))
+        account_filter = "AND account_id = ?" if account_id else ""
+        with db.get_read_connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT account_id, tx_type, amount, timestamp FROM transactions
+                WHERE timestamp >= ? AND status = 'SUCCESS' AND tx_type IN ({marks}) {account_filter}
+                ORDER BY timestamp
+                """,
+                [since] + types + ([account_id] if account_id else []),
+            )
+            for account_id, tx_type, amount, timestamp in rows:
+                ts = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+                self.record(account_id, COUNTS_AS.get(tx_type, tx_type), amount, ts)
@@ -0,0 +1,105 @@
+# rollups.py
+
+import sys
+from typing import Dict, List
+
+import db
+
+# Same aggregation insert_transaction maintains incrementally, computed from scratch.
+ROLLUP_SELECT_SQL = """
+    SELECT
+        substr(t.timestamp, 1, 10) AS day,
+        IFNULL(a.account_type, 'UNKNOWN') AS account_type,
+        t.tx_type,
+        COUNT(*) AS tx_count,
+        SUM(t.amount) AS total_amount,
+        MIN(t.amount) AS min_amount,
+        MAX(t.amount) AS max_amount
+    FROM transactions t
+    LEFT JOIN accounts a ON a.account_id = t.account_id
+    WHERE t.status = 'SUCCESS' AND t.timestamp >= ?
+    GROUP BY day, account_type, t.tx_type
+"""
+
+
+def backfill(since_day: str = "") -> int:
+    """Rebuild daily_rollups from transactions (optionally only from `since_day`).
+
+    Days whose rows were (even partly) moved to the archive keep their rollups:
+    only days still wholly in the hot tier are rebuilt. Runs in a single SQL
+    transaction so readers never see a half-built day. Returns the number of
+    rollup rows written.
+    """
+    with db.get_connection() as conn:
+        cur = conn.cursor()
+        since_day = max(since_day, db.hot_tier_start(conn))
+        cur.execute("DELETE FROM daily_rollups WHERE day >= ?", (since_day,))
+        cur.execute(
+            """
+            INSERT INTO daily_rollups (day, account_type, tx_type, tx_count, total_amount, min_amount, max_amount)
+            """ + ROLLUP_SELECT_SQL,
+            (since_day,),
+        )
+        return cur.rowcount
+
+
+def check_consistency(since_day: str = "", tolerance: float = 1e-6) -> List[Dict]:
+    """Compare daily_rollups against a fresh aggregate; return the mismatching keys.
+
+    Archived days are skipped, like in backfill().
+    """
+    with db.get_read_connection() as conn:
+        since_day = max(since_day, db.hot_tier_start(conn))
+        expected = {
+            row[:3]: row[3:]
+            for row in conn.execute(ROLLUP_SELECT_SQL, (since_day,))
+        }
+        actual = {
+            row[:3]: row[3:]
+            for row in conn.execute(
+                """
+                SELECT day, account_type, tx_type, tx_count, total_amount, min_amount, max_amount
+                FROM daily_rollups WHERE day >= ?
+                """,
+                (since_day,),
+            )
+        }
+
+    fields = ("tx_count", "total_amount", "min_amount", "max_amount")
+    problems = []
+    for key in sorted(set(expected) | set(actual)):
+        exp = expected.get(key)
+        act = actual.get(key)
+        if exp is not None and act is not None and all(
+            abs(e - a) <= tolerance for e, a in zip(exp, act)
+        ):
+            continue
+        problems.append({
+            "day": key[0],
+            "account_type": key[1],
+            "tx_type": key[2],
+            "expected": dict(zip(fields, exp)) if exp else None,
+            "actual": dict(zip(fields, act)) if act else None,
+        })
+    return problems
+
+
+if __name__ == "__main__":
+    # usage: python rollups.py backfill|check [SINCE_DAY]
+    db.init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    since = sys.argv[2] if len(sys.argv) > 2 else ""
+
+    if command == "backfill":
+        print(f"✅ Rebuilt {backfill(since)} rollup rows.")
+    elif command == "check":
+        problems = check_consistency(since)
+        if not problems:
+            print("✅ Rollups are consistent.")
+        else:
+            for p in problems:
+                print(f"❌ {p['day']} {p['account_type']} {p['tx_type']}: expected={p['expected']} actual={p['actual']}")
+            sys.exit(1)
+    else:
+        print("usage: python rollups.py backfill|check [SINCE_DAY]")
+        sys.exit(2)
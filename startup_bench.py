@@ -0,0 +1,67 @@
+# startup_bench.py
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set, Tuple
+
+import db
+
+# command lines to time; {acc} is filled with an existing account id
+SCENARIOS = {
+    "import only": ["-c", "import db"],
+    "balance (one-shot)": ["main.py", "balance", "{acc}"],
+    "interactive menu (load + exit)": ["-c", "import db, menu; db.init_db(); menu.Bank('ProjectBank')"],
+}
+
+
+def time_command(args: List[str], runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def import_profile(args: List[str], top: int = 10) -> Tuple[List[Dict], Set[str]]:
+    """Run once with -X importtime; return the top modules by self time and all module names."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    rows.sort(key=lambda r: r["self_us"], reverse=True)
+    return rows[:top], {r["module"] for r in rows}
+
+
+def main(runs: int = 10):
+    db.init_db()
+    with db.get_read_connection() as conn:
+        row = conn.execute("SELECT account_id FROM accounts LIMIT 1").fetchone()
+    acc = row[0] if row else "ACC-00000000"
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"=== Startup time ({runs} runs each) ===")
+    for label, args in SCENARIOS.items():
+        args = [a.format(acc=acc) for a in args]
+        timings = time_command(args, runs)
+        print(f"{label:32} median {statistics.median(timings) * 1000:7.1f} ms   min {min(timings) * 1000:7.1f} ms")
+
+    print("\n=== -X importtime: `main.py balance` (largest self time) ===")
+    top, modules = import_profile(["main.py", "balance", acc])
+    for r in top:
+        print(f"{r['module']:32} self {r['self_us'] / 1000:6.1f} ms   cumulative {r['cumulative_us'] / 1000:6.1f} ms")
+    heavy = sorted(m for m in modules if m.split(".")[0] in ("streamlit", "pandas", "numpy", "menu", "reports"))
+    print("\nUI/analytics modules imported:", ", ".join(heavy) or "none ✅")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,34 @@
+# tests/__init__.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import db
+
+
+class BankTestCase(unittest.TestCase):
+    """Each test runs on a fresh bank.db in its own temporary working directory."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)   # ops.journal, audit.log and backups/ are relative
+        self.db_name = db.DB_NAME
+        db.DB_NAME = os.path.join(self.dir, "bank.db")
+        db.init_db()
+        self.banks = []
+
+    def tearDown(self):
+        for bank in self.banks:
+            bank.close()
+        db.DB_NAME = self.db_name
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def bank(self, **kwargs):
+        from bank import Bank
+        bank = Bank("Test", **kwargs)
+        self.banks.append(bank)
+        return bank
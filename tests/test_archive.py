@@ -0,0 +1,40 @@
+# tests/test_archive.py
+
+import sqlite3
+import unittest
+
+import archive
+import db
+from tests import BankTestCase
+
+
+class ArchiveTest(BankTestCase):
+    def add_old_rows(self, account_id):
+        for i, ts in enumerate(["2024-01-05T10:00:00", "2024-01-20T10:00:00"]):
+            db.insert_transaction({"tx_id": f"OLD{i}", "account_id": account_id, "tx_type": "DEPOSIT", "amount": 1.0,
+                                   "status": "SUCCESS", "message": "", "timestamp": ts})
+
+    def archived_tx_ids(self):
+        conn = sqlite3.connect(db.archive_path("archive/bank-2024-01.db"))
+        try:
+            return [row[0] for row in conn.execute("SELECT tx_id FROM transactions ORDER BY tx_id")]
+        finally:
+            conn.close()
+
+    def test_rerun_after_crash_between_copy_and_delete(self):
+        account_id = self.bank().create_account("Ann", "SAVINGS", 100).account_id
+        self.add_old_rows(account_id)
+        archive.archive_old_rows(365, batch_size=1)
+        self.assertEqual(self.archived_tx_ids(), ["OLD0", "OLD1"])
+
+        # the copy committed to the archive file, the delete from main did not
+        self.add_old_rows(account_id)
+        archive.archive_old_rows(365, batch_size=1)
+
+        self.assertEqual(self.archived_tx_ids(), ["OLD0", "OLD1"])
+        with db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM transactions WHERE tx_id LIKE 'OLD%'").fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# tests/test_audit.py
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from audit import AuditLogger, AuditPolicy
+from tests import BankTestCase
+
+
+class AggregationTimerTest(BankTestCase):
+    def logged(self, logger, action):
+        return [e for e in logger.get_entries() if e["action"] == action]
+
+    def test_new_windows_reuse_the_pending_timer(self):
+        logger = AuditLogger(policy=AuditPolicy({"BALANCE_CHECK": ("AGGREGATE", 60.0)}))
+        try:
+            with mock.patch("audit.threading.Timer", wraps=threading.Timer) as timer:
+                for i in range(50):
+                    logger.log("BALANCE_CHECK", f"ACC-{i}")
+            self.assertEqual(timer.call_count, 1)
+        finally:
+            logger.close()
+        self.assertEqual(len(self.logged(logger, "BALANCE_CHECK")), 50)
+
+    def test_timer_closes_windows_without_further_logging(self):
+        logger = AuditLogger(policy=AuditPolicy({
+            "BALANCE_CHECK": ("AGGREGATE", 0.1),
+            "GET_ACCOUNT": ("AGGREGATE", 0.3),
+        }))
+        try:
+            logger.log("GET_ACCOUNT", "ACC-1")
+            logger.log("BALANCE_CHECK", "ACC-1")   # closes earlier: replaces the timer
+            time.sleep(0.2)
+            self.assertEqual(len(self.logged(logger, "BALANCE_CHECK")), 1)
+            self.assertEqual(self.logged(logger, "GET_ACCOUNT"), [])
+            time.sleep(0.25)
+            self.assertEqual(len(self.logged(logger, "GET_ACCOUNT")), 1)
+
+            logger.log("BALANCE_CHECK", "ACC-2")   # re-armed after the timer fired
+            time.sleep(0.25)
+            self.assertEqual(len(self.logged(logger, "BALANCE_CHECK")), 2)
+        finally:
+            logger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_audit_search.py
+
+import unittest
+from unittest import mock
+
+import db
+from tests import BankTestCase
+
+
+class AuditSearchTest(BankTestCase):
+    def setUp(self):
+        super().setUp()
+        db._read_pools.clear()
+        for i in range(30):
+            db.insert_audit_entry({"timestamp": f"2026-01-01T00:00:{i:02d}", "action": "DEPOSIT",
+                                   "account_id": f"ACC-{i % 3}", "amount": float(i), "status": "SUCCESS",
+                                   "message": "balance updated" if i % 2 else "deposit accepted"})
+
+    def expected_ids(self, account_id=None):
+        sql = "SELECT id FROM audit_log WHERE message LIKE '%balance%'"
+        params = ()
+        if account_id:
+            sql += " AND account_id = ?"
+            params = (account_id,)
+        with db.get_connection() as conn:
+            return [row[0] for row in conn.execute(sql + " ORDER BY id DESC", params)]
+
+    def search_plans(self, **kwargs):
+        """Run a search and return the query plan of every SQL statement it issued."""
+        statements = []
+        real_open = db._open_read_only
+
+        def traced(path):
+            conn = real_open(path)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        with mock.patch("db._open_read_only", side_effect=traced):
+            db._read_pools.clear()
+            result = db.search_audit_logs(**kwargs)
+        with db.get_connection() as conn:
+            plans = [
+                " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+                for sql in statements if "audit_log" in sql and sql.lstrip().upper().startswith("SELECT")
+            ]
+        return result, plans
+
+    def test_text_search_pages_newest_first(self):
+        seen = []
+        before_id = None
+        while True:
+            page = db.search_audit_logs(text="balance", limit=4, before_id=before_id)
+            seen += [row["id"] for row in page["rows"]]
+            before_id = page["next_before_id"]
+            if before_id is None:
+                break
+        self.assertEqual(seen, self.expected_ids())
+
+        page = db.search_audit_logs(text="balance", account_id="ACC-1", limit=100)
+        self.assertEqual([row["id"] for row in page["rows"]], self.expected_ids("ACC-1"))
+
+    def test_text_search_does_not_sort_matches(self):
+        for kwargs in ({"text": "balance"}, {"text": "balance", "account_id": "ACC-1"}, {"text": "balance", "before_id": 20}):
+            result, plans = self.search_plans(**kwargs)
+            self.assertTrue(result["rows"])
+            self.assertTrue(plans)
+            for plan in plans:
+                self.assertNotIn("TEMP B-TREE", plan, kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# tests/test_backup.py
+
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+
+import backup
+import db
+from tests import BankTestCase
+
+
+class PointInTimeRestoreTest(BankTestCase):
+    def test_backup_taken_during_deposit_restores_exact_balance(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 100).account_id
+        backup.full_backup()
+
+        real_insert = db.insert_transaction_row
+        copied = threading.Event()
+        taker = threading.Thread(target=backup.full_backup)
+
+        def paced_then_signal(*args, **kwargs):
+            stats = real_paced(*args, **kwargs)
+            copied.set()
+            return stats
+
+        def insert_during_backup(cur, tx, *args, **kwargs):
+            if tx["tx_type"] == "DEPOSIT" and tx["amount"] == 50:
+                # the deposit's balance step is done, its transaction row is not
+                taker.start()
+                self.assertTrue(copied.wait(10))
+            return real_insert(cur, tx, *args, **kwargs)
+
+        real_paced = db.paced_backup
+        with mock.patch("db.insert_transaction_row", side_effect=insert_during_backup), \
+                mock.patch("db.paced_backup", side_effect=paced_then_signal):
+            bank.deposit(account_id, 50)
+        taker.join(10)
+
+        backup.incremental_backup()
+        backup.restore("restored.db")
+        conn = sqlite3.connect("restored.db")
+        try:
+            restored = conn.execute("SELECT balance FROM accounts WHERE account_id = ?", (account_id,)).fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(db.fetch_account(account_id)["balance"], 150.0)
+        self.assertEqual(restored, 150.0)
+
+    def restored_balances(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return dict(conn.execute("SELECT account_id, balance FROM accounts"))
+        finally:
+            conn.close()
+
+    def test_restore_never_stops_inside_a_transfer(self):
+        bank = self.bank()
+        a = bank.create_account("Ann", "SAVINGS", 1000).account_id
+        c = bank.create_account("Cid", "SAVINGS", 0).account_id
+        backup.full_backup()
+        bank.transfer(a, c, 300)
+        backup.incremental_backup()
+
+        out_leg = next(
+            e for e in db.fetch_events_after(0, 1000)
+            if e["source"] == "transactions" and e["data"]["tx_type"] == "TRANSFER_OUT"
+        )
+        backup.restore("by_seq.db", until_seq=out_leg["seq"])
+        backup.restore("by_time.db", until=out_leg["data"]["timestamp"])
+        for path in ("by_seq.db", "by_time.db"):
+            self.assertEqual(self.restored_balances(path), {a: 1000.0, c: 0.0}, path)
+
+        backup.restore("latest.db")
+        self.assertEqual(self.restored_balances("latest.db"), {a: 700.0, c: 300.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# tests/test_cdc.py
+
+import unittest
+
+import db
+from cdc import EventFeed
+from tests import BankTestCase
+
+
+class EventFeedTest(BankTestCase):
+    def test_failed_batch_is_redelivered_not_skipped(self):
+        bank = self.bank()
+        feed = EventFeed(batch_size=10, prune_interval=None)
+        seen, calls = [], []
+
+        def flaky_sink(events):
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise OSError("sink down")
+            seen.extend(e["seq"] for e in events)
+
+        feed.subscribe("sink", flaky_sink)
+        start = db.latest_event_seq()
+        for i in range(25):
+            bank.create_account(f"Owner {i}", "SAVINGS", 0)
+        end = db.latest_event_seq()
+        self.assertGreaterEqual(end - start, 25)
+
+        feed.poll_once()
+        self.assertEqual(seen, [])
+        self.assertEqual(db.get_consumer_offset("sink"), start)
+
+        feed.poll_once()
+        self.assertEqual(seen, list(range(start + 1, end + 1)))
+        self.assertEqual(db.get_consumer_offset("sink"), end)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+# tests/test_integrity.py
+
+import unittest
+
+import db
+import integrity
+import ledger
+from tests import BankTestCase
+
+
+class BalanceVerifierTest(BankTestCase):
+    def test_ledger_and_integrity_report_the_same_balances(self):
+        bank = self.bank()
+        ids = [bank.create_account(f"Owner {i}", "SAVINGS", 100).account_id for i in range(6)]
+        bank.transfer(ids[0], ids[1], 30)
+        with db.get_connection() as conn:
+            conn.execute("UPDATE accounts SET balance = balance + 5 WHERE account_id = ?", (ids[2],))
+
+        from_ledger = ledger.verify_projection(2)
+        report = integrity.verify(2, report_path=None)
+        from_integrity = [p for p in report["discrepancies"] if p["check"] == "balance"]
+
+        self.assertEqual(from_ledger, [{"account_id": ids[2], "stored": 105.0, "from_postings": 100.0}])
+        self.assertEqual(
+            [(p["account_id"], p["stored"], p["from_transactions"]) for p in from_integrity],
+            [(p["account_id"], p["stored"], p["from_postings"]) for p in from_ledger],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_jobs.py
+
+import unittest
+from unittest import mock
+
+import db
+import jobs
+import journal
+from tests import BankTestCase
+
+
+class InterestAccrualTest(BankTestCase):
+    def test_accrual_during_bank_operation_is_kept(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 1200).account_id
+        real_apply = journal.apply_steps
+
+        def accrue_then_apply(steps):
+            # the batch commits after the Bank computed its new balance, before it writes
+            jobs.run_interest_accrual("2024-01", bank)
+            real_apply(steps)
+
+        with mock.patch("bank.apply_steps", side_effect=accrue_then_apply):
+            bank.deposit(account_id, 100)
+
+        postings = sum(
+            db.signed_amount(tx) for tx in db.fetch_transactions_for_account(account_id) if tx["status"] == "SUCCESS"
+        )
+        self.assertEqual(postings, 1304.0)
+        self.assertEqual(db.fetch_account(account_id)["balance"], 1304.0)
+        self.assertEqual(bank.accounts[account_id].balance, 1304.0)
+
+    def test_resume_covers_partitions_that_never_started(self):
+        bank = self.bank()
+        ids = [bank.create_account(f"Owner {i}", "SAVINGS", 1200).account_id for i in range(8)]
+        real_accrue = jobs._accrue_range
+
+        def crash_late_partitions(period, lo, hi, part, *args):
+            # the process dies before partitions 2..7 get to run
+            if part >= 2:
+                raise RuntimeError("crash")
+            return real_accrue(period, lo, hi, part, *args)
+
+        with mock.patch("jobs._accrue_range", side_effect=crash_late_partitions):
+            with self.assertRaises(RuntimeError):
+                jobs.run_interest_accrual("2024-01", partitions=8)
+
+        self.assertEqual(jobs.run_interest_accrual("2024-01", partitions=8), 6)
+        self.assertEqual(jobs.run_interest_accrual("2024-01", partitions=8), 0)
+        self.assertEqual({db.fetch_account(a)["balance"] for a in ids}, {1204.0})
+
+
+class StandingOrderTest(BankTestCase):
+    def test_order_cannot_spend_funds_of_operation_in_flight(self):
+        bank = self.bank()
+        src = bank.create_account("Ann", "SAVINGS", 100).account_id
+        dst = bank.create_account("Bob", "SAVINGS", 0).account_id
+        jobs.add_standing_order(src, dst, 50, 30, first_run="2024-01-01T00:00:00")
+        real_apply = journal.apply_steps
+        results = []
+
+        def run_orders_then_apply(steps):
+            # the Bank has debited memory but not yet written the withdrawal
+            results.append(jobs.run_standing_orders(bank=bank))
+            real_apply(steps)
+
+        with mock.patch("bank.apply_steps", side_effect=run_orders_then_apply):
+            bank.withdraw(src, 80)
+
+        self.assertEqual(results, [{"executed": 0, "failed": 1}])
+        self.assertEqual(db.fetch_account(src)["balance"], 20.0)
+        self.assertEqual(bank.accounts[src].balance, 20.0)
+        self.assertEqual(db.fetch_account(dst)["balance"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# tests/test_recovery.py
+
+import threading
+import unittest
+from unittest import mock
+
+import db
+import journal
+from tests import BankTestCase
+
+
+class RecoveryTest(BankTestCase):
+    def audit_actions(self, account_id):
+        with db.get_connection() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT action FROM audit_log WHERE account_id = ? ORDER BY id", (account_id,)
+            )]
+
+    def test_replays_operation_of_crashed_bank(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 100).account_id
+        tx = {"tx_id": "TX-CRASHED", "account_id": account_id, "tx_type": "DEPOSIT", "amount": 50.0,
+              "status": "SUCCESS", "message": "New balance=150.0", "timestamp": "2024-01-01T00:00:00"}
+        # the process dies after writing the INTENT, before any DB step
+        op_id = bank.journal.begin("DEPOSIT", [
+            {"kind": "balance", "account_id": account_id, "before": 100.0, "after": 150.0},
+            {"kind": "tx", "tx": tx},
+        ])
+        bank.journal.abandon(op_id)
+
+        self.bank()
+        self.assertEqual(db.fetch_account(account_id)["balance"], 150.0)
+        self.assertTrue(db.transaction_exists("TX-CRASHED"))
+        self.assertIn("RECOVERY", self.audit_actions(account_id))
+        self.assertEqual(journal.OperationJournal().incomplete(), [])
+
+    def test_new_bank_waits_for_operation_in_flight(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 100).account_id
+        in_flight, proceed = threading.Event(), threading.Event()
+        real_apply = journal.apply_steps
+
+        def slow_apply(steps):
+            in_flight.set()
+            proceed.wait(5)
+            real_apply(steps)
+
+        errors = []
+
+        def deposit():
+            try:
+                bank.deposit(account_id, 50)
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch("bank.apply_steps", side_effect=slow_apply):
+            worker = threading.Thread(target=deposit)
+            worker.start()
+            self.assertTrue(in_flight.wait(5))
+
+            # a second Bank (another Streamlit session) starts mid-operation
+            starter = threading.Thread(target=self.bank)
+            starter.start()
+            starter.join(0.3)
+            self.assertTrue(starter.is_alive(), "recovery must wait for the operation in flight")
+
+            proceed.set()
+            worker.join(5)
+            starter.join(5)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(db.fetch_account(account_id)["balance"], 150.0)
+        actions = self.audit_actions(account_id)
+        self.assertIn("DEPOSIT", actions)
+        self.assertNotIn("RECOVERY", actions)
+
+    def test_replay_racing_the_original_is_harmless(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 100).account_id
+        tx = {"tx_id": "TX-TWICE", "account_id": account_id, "tx_type": "DEPOSIT", "amount": 50.0,
+              "status": "SUCCESS", "message": "", "timestamp": "2024-01-01T00:00:00"}
+        steps = [
+            {"kind": "balance", "account_id": account_id, "before": 100.0, "after": 150.0},
+            {"kind": "tx", "tx": tx},
+        ]
+        journal.apply_steps(steps)
+        journal.apply_steps(steps)
+        self.assertEqual(db.fetch_account(account_id)["balance"], 150.0)
+        self.assertEqual(len(db.fetch_transactions_for_account(account_id)), 2)
+
+    def test_failed_write_restores_memory_and_keeps_intent(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 100).account_id
+        with mock.patch("bank.apply_steps", side_effect=OSError("disk I/O error")):
+            with self.assertRaises(OSError):
+                bank.deposit(account_id, 50)
+        self.assertEqual(bank.check_balance(account_id), 100.0)
+
+        # the journal passes its size limit: truncation must keep the abandoned INTENT
+        with mock.patch("journal.JOURNAL_MAX_BYTES", 0):
+            self.assertEqual(bank.deposit(account_id, 10), 110.0)
+        self.assertEqual(db.fetch_account(account_id)["balance"], 110.0)
+        self.assertEqual(len(journal.OperationJournal().incomplete()), 1)
+
+        bank.close()
+        self.assertEqual(self.bank().check_balance(account_id), 160.0)
+        self.assertEqual(db.fetch_account(account_id)["balance"], 160.0)
+
+    def test_failed_capture_reopens_hold(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 100).account_id
+        hold_id = bank.authorize(account_id, 40)
+        with mock.patch("bank.apply_steps", side_effect=OSError("disk I/O error")):
+            with self.assertRaises(OSError):
+                bank.capture(hold_id, 30)
+        self.assertEqual(bank.check_balance(account_id), 100.0)
+        self.assertEqual(bank.get_available_balance(account_id), 60.0)
+        self.assertIn(hold_id, bank.holds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# tests/test_risk.py
+
+import unittest
+
+import db
+import jobs
+from tests import BankTestCase
+
+
+class VelocityLimitTest(BankTestCase):
+    def test_capture_counts_against_withdrawal_limit(self):
+        bank = self.bank()
+        account_id = bank.create_account("Ann", "SAVINGS", 200000).account_id
+
+        hold_id = bank.authorize(account_id, 60000)
+        with self.assertRaises(ValueError):
+            bank.capture(hold_id)
+        self.assertIn(hold_id, bank.holds)
+        self.assertEqual(bank.check_balance(account_id), 200000.0)
+
+        bank.capture(hold_id, 40000)
+        with self.assertRaises(ValueError):
+            bank.withdraw(account_id, 20000)
+
+        # the window is rebuilt from history after a restart, captures included
+        bank.close()
+        with self.assertRaises(ValueError):
+            self.bank().withdraw(account_id, 20000)
+
+    def test_standing_orders_count_against_transfer_limit(self):
+        bank = self.bank()
+        src = bank.create_account("Ann", "SAVINGS", 500000).account_id
+        dst = bank.create_account("Bob", "SAVINGS", 0).account_id
+        for _ in range(2):
+            jobs.add_standing_order(src, dst, 60000, 30, first_run="2024-01-01T00:00:00")
+
+        self.assertEqual(jobs.run_standing_orders(bank=bank), {"executed": 1, "failed": 1})
+        with self.assertRaises(ValueError):
+            bank.transfer(src, dst, 50000)
+        self.assertEqual(db.fetch_account(src)["balance"], 440000.0)
+
+    def test_standing_orders_without_bank_use_committed_history(self):
+        bank = self.bank()
+        src = bank.create_account("Ann", "SAVINGS", 500000).account_id
+        dst = bank.create_account("Bob", "SAVINGS", 0).account_id
+        bank.transfer(src, dst, 90000)
+        jobs.add_standing_order(src, dst, 20000, 30, first_run="2024-01-01T00:00:00")
+
+        self.assertEqual(jobs.run_standing_orders(), {"executed": 0, "failed": 1})
+        self.assertEqual(db.fetch_account(src)["balance"], 410000.0)
+
+
+if __name__ == "__main__":
+    unittest.main()